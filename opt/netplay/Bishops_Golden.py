@@ -10,7 +10,7 @@ import random
 
 from enum import Enum
 
-from typing import List, Dict, Tuple, Optional, Set
+from typing import List, Dict, Tuple, Optional, Set, FrozenSet
 
 import datetime
 
@@ -20,7 +20,6 @@ import pygame
 
 from collections import deque
 
-import hashlib
 import threading
 
 # Bishops: Four-Player Chess  v1.6.4 (Consolidated Two-Player Mode)
@@ -89,6 +88,8 @@ BANNER_OK = (35, 35, 35)
 
 MOVE_DELAY_MS = 500
 
+FULL_PRESENT_MS = 250   # longest a quiet frame may go without a full display flip
+
 ELIM_FLASH_MS = 3000
 
 ELIM_FLASH_RATE_MS = 250
@@ -109,6 +110,20 @@ SETTINGS_PATH = os.path.join(SCRIPT_DIR, "bishops_settings.json")
 
 WINDOW_ICON_PATH = os.path.join(SCRIPT_DIR, "helmet_icon.png")
 
+DOCS_DIR = os.path.join(SCRIPT_DIR, "docs")
+
+TOOLS_DIR = os.path.join(SCRIPT_DIR, "tools")
+
+RULES_TXT_PATH = os.path.join(DOCS_DIR, "rules.txt")
+
+SELFTEST_LAST_PATH = os.path.join(DOCS_DIR, "selftest_last.txt")
+
+# tools/ holds export_rules and friends; importable from the self-tests and CLI flags
+
+if TOOLS_DIR not in sys.path:
+
+    sys.path.append(TOOLS_DIR)
+
 
 
 VERSION_STR = "Bishops: Four-Player Chess  v1.6.5"
@@ -281,6 +296,8 @@ class PColor(Enum):
 
 TURN_ORDER = [PColor.WHITE, PColor.GREY, PColor.BLACK, PColor.PINK]
 
+TURN_INDEX = {col: i for i, col in enumerate(TURN_ORDER)}  # seat -> position in TURN_ORDER
+
 
 
 PLAYER_COLORS = {
@@ -551,6 +568,10 @@ def king_home_cells(color: PColor):
     return [(r0, c0), (r0, c0 + 1), (r0 + 1, c0), (r0 + 1, c0 + 1)]
 
 
+# CORNER_RECTS is fixed, so each colour's home cells can be hashed once
+_KING_HOME_CELLS = {col: frozenset(king_home_cells(col)) for col in CORNER_RECTS}
+
+
 def corner_owner_at(r, c):
     for col, (r0, c0) in CORNER_RECTS.items():
         if r0 <= r <= r0 + 1 and c0 <= c <= c0 + 1:
@@ -606,26 +627,66 @@ def in_chess_area(r: int, c: int) -> bool:
 
 
 
+# ----- Square bitmasks (bit index = r * BOARD_SIZE + c) -----
+# Board.bb holds one occupancy int per colour; AND-ing with these static masks answers
+# "does this colour have anything outside the 8-8?" without touching the squares.
+OUTSIDE_MASK = sum(1 << (r * BOARD_SIZE + c)
+                   for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)
+                   if not in_chess_area(r, c))
+INSIDE_MASK = ~OUTSIDE_MASK & ((1 << (BOARD_SIZE * BOARD_SIZE)) - 1)
 
-def _pieces_of_kind(board: 'Board', color: PColor, kind: str) -> List[Tuple[int, int, 'Piece']]:
 
-    """Return a list of (row, col, piece) tuples for a colour filtered by kind."""
+def bb_squares(bits: int):
+    """Yield (r, c) for every set bit of a square bitmask, lowest bit first."""
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        yield divmod(low.bit_length() - 1, BOARD_SIZE)
+
+
+def bb_first(bits: int) -> Optional[Tuple[int, int]]:
+    """(r, c) of the lowest set bit of a square bitmask, or None when it is empty."""
+    if not bits:
+        return None
+    return divmod((bits & -bits).bit_length() - 1, BOARD_SIZE)
 
-    results: List[Tuple[int, int, 'Piece']] = []
 
-    for rr in range(BOARD_SIZE):
+def _has_piece_outside(board, color) -> bool:
+    """True when `color` still has any piece outside the 8-8 (one mask test on its bitboard)."""
+    return bool(board.bb[color] & OUTSIDE_MASK)
 
-        row = board.grid[rr]
 
-        for cc in range(BOARD_SIZE):
+# ----- Zobrist keys (Board.zhash) -----
+# One random 64-bit key per (kind, colour, square) plus one per square for has_moved,
+# which castling and pawn double-steps depend on. Seeded so hashes are reproducible.
+_zobrist_rng = random.Random(0xB15C0B)
+ZOBRIST_PIECE = {kind: {col: [_zobrist_rng.getrandbits(64) for _ in range(BOARD_SIZE * BOARD_SIZE)]
+                        for col in PColor}
+                 for kind in 'KQRBNP'}
+ZOBRIST_MOVED = [_zobrist_rng.getrandbits(64) for _ in range(BOARD_SIZE * BOARD_SIZE)]
+# Rule-affecting game state folded into GameState._position_key (repetition detection)
+ZOBRIST_TWO_STAGE = _zobrist_rng.getrandbits(64)
+ZOBRIST_PAWN_DIR = {col: {d: _zobrist_rng.getrandbits(64) for d in (-1, 1)} for col in PColor}
+ZOBRIST_TURN_PARITY = _zobrist_rng.getrandbits(64)
 
-            piece = row[cc]
 
-            if piece and piece.color == color and piece.kind == kind:
+def zobrist_key(p, idx: int) -> int:
+    """Hash contribution of piece p standing on square index idx (0 for an empty square)."""
+    if not p:
+        return 0
+    k = ZOBRIST_PIECE[p.kind][p.color][idx]
+    return k ^ ZOBRIST_MOVED[idx] if p.has_moved else k
+
+
+
+
+def _pieces_of_kind(board: 'Board', color: PColor, kind: str) -> List[Tuple[int, int, 'Piece']]:
+
+    """Return a list of (row, col, piece) tuples for a colour filtered by kind."""
 
-                results.append((rr, cc, piece))
+    grid = board.grid
 
-    return results
+    return [(rr, cc, grid[rr][cc]) for rr, cc in bb_squares(board.pieces_of(color, kind))]
 
 
 
@@ -637,15 +698,15 @@ def _is_piece_alive(board: 'Board', piece: 'Piece') -> bool:
 
         return False
 
-    for rr in range(BOARD_SIZE):
+    # A piece never changes colour, so only its colour's occupied squares can hold it
 
-        row = board.grid[rr]
+    grid = board.grid
 
-        for cc in range(BOARD_SIZE):
+    for rr, cc in bb_squares(board.bb.get(piece.color, 0)):
 
-            if row[cc] is piece:
+        if grid[rr][cc] is piece:
 
-                return True
+            return True
 
     return False
 
@@ -941,6 +1002,12 @@ def dist_to_chess(r: int, c: int) -> int:
 
 
 
+# Per-square tables (index r * BOARD_SIZE + c) for the move filters that test every candidate
+_IN_CHESS_LUT = tuple(in_chess_area(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE))
+_DIST_LUT = tuple(dist_to_chess(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE))
+
+
+
 UNICODE = {
 
     'K': {PColor.WHITE:'\u2654', PColor.BLACK:'\u265A', PColor.GREY:'\u2654', PColor.PINK:'\u2654'},
@@ -1021,6 +1088,9 @@ def save_user_settings(d: Dict):
 
 class Piece:
 
+    # fixed attribute set: no per-instance __dict__, cheaper .kind/.color loads in the move loops
+    __slots__ = ('kind', 'color', 'has_moved', 'tint_override')
+
     def __init__(self, kind: str, color: PColor):
 
         self.kind = kind  # 'K','Q','R','B','N','P'
@@ -1041,6 +1111,16 @@ class Board:
 
         self.king_positions = {PColor.WHITE: None, PColor.GREY: None, PColor.BLACK: None, PColor.PINK: None}
         self.bishop_positions = {PColor.WHITE: set(), PColor.GREY: set(), PColor.BLACK: set(), PColor.PINK: set()}
+        # colours whose king is on the board; kept in step with king_positions by set()
+        self._alive: Set[PColor] = set()
+        # per-colour occupancy bitboards (see OUTSIDE_MASK); maintained by set()
+        self.bb: Dict[PColor, int] = {col: 0 for col in PColor}
+        # per-kind occupancy over all colours; bb[col] & kind_bb[kind] locates a colour's pieces of a kind
+        self.kind_bb: Dict[str, int] = {kind: 0 for kind in 'KQRBNP'}
+        # Zobrist hash of the placement; _zsq keeps each square's current contribution so
+        # set() can XOR out exactly what it XOR-ed in (see refresh_square for in-place edits)
+        self.zhash = 0
+        self._zsq: List[int] = [0] * (BOARD_SIZE * BOARD_SIZE)
 
         self._setup()
 
@@ -1152,14 +1232,28 @@ class Board:
             prev = self.grid[r][c]
             self.grid[r][c] = p
 
+            idx = r * BOARD_SIZE + c
+            bit = 1 << idx
+            if prev:
+                self.bb[prev.color] &= ~bit
+                self.kind_bb[prev.kind] &= ~bit
+            if p:
+                self.bb[p.color] |= bit
+                self.kind_bb[p.kind] |= bit
+            zk = zobrist_key(p, idx)
+            self.zhash ^= self._zsq[idx] ^ zk
+            self._zsq[idx] = zk
+
             # maintain king cache
 
             if prev and prev.kind == 'K':
                 if self.king_positions.get(prev.color) == (r,c):
                     self.king_positions[prev.color] = None
+                    self._alive.discard(prev.color)
             if p and p.kind == 'K':
 
                 self.king_positions[p.color] = (r,c)
+                self._alive.add(p.color)
 
             else:
 
@@ -1170,6 +1264,7 @@ class Board:
                     if pos == (r,c) and (p is None or p.kind != 'K'):
 
                         self.king_positions[col] = None
+                        self._alive.discard(col)
 
             # maintain bishop cache
             if prev and prev.kind == 'B':
@@ -1195,6 +1290,12 @@ class Board:
 
                 return pos
 
+        elif color not in self._alive:
+
+            # set() keeps the alive set exact, so an eliminated colour needs no rescan
+
+            return None
+
         # fallback: scan and update cache
 
         for r in range(BOARD_SIZE):
@@ -1206,25 +1307,141 @@ class Board:
                 if p and p.color == color and p.kind == 'K':
 
                     self.king_positions[color] = (r,c)
+                    self._alive.add(color)
 
                     return (r,c)
 
         self.king_positions[color] = None
+        self._alive.discard(color)
 
         return None
 
     def _rebuild_piece_index(self):
         self.king_positions = {PColor.WHITE: None, PColor.GREY: None, PColor.BLACK: None, PColor.PINK: None}
         self.bishop_positions = {PColor.WHITE: set(), PColor.GREY: set(), PColor.BLACK: set(), PColor.PINK: set()}
+        self.bb = {col: 0 for col in PColor}
+        self.kind_bb = {kind: 0 for kind in 'KQRBNP'}
+        self.zhash = 0
+        self._zsq = [0] * (BOARD_SIZE * BOARD_SIZE)
         for r in range(BOARD_SIZE):
             for c in range(BOARD_SIZE):
                 p = self.grid[r][c]
                 if not p:
                     continue
+                idx = r * BOARD_SIZE + c
+                self.bb[p.color] |= 1 << idx
+                self.kind_bb[p.kind] |= 1 << idx
+                zk = zobrist_key(p, idx)
+                self._zsq[idx] = zk
+                self.zhash ^= zk
                 if p.kind == 'K':
                     self.king_positions[p.color] = (r, c)
                 elif p.kind == 'B':
                     self.bishop_positions[p.color].add((r, c))
+        self._alive = {col for col, pos in self.king_positions.items() if pos is not None}
+
+    def refresh_square(self, r: int, c: int):
+        """Re-hash and re-index (r, c) after its piece changed kind or has_moved in place."""
+        idx = r * BOARD_SIZE + c
+        p = self.grid[r][c]
+        zk = zobrist_key(p, idx)
+        self.zhash ^= self._zsq[idx] ^ zk
+        self._zsq[idx] = zk
+        bit = 1 << idx
+        for kind in self.kind_bb:
+            self.kind_bb[kind] &= ~bit
+        if p:
+            self.kind_bb[p.kind] |= bit
+
+    def pieces_of(self, color: PColor, kind: str) -> int:
+        """Bitmask of `color`'s pieces of `kind` (walk it with bb_squares)."""
+        return self.bb[color] & self.kind_bb[kind]
+
+    def reset_empty(self):
+        """Clear every square and zero the piece caches, bitboards and hash in one shot."""
+        self.grid = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.king_positions = {PColor.WHITE: None, PColor.GREY: None, PColor.BLACK: None, PColor.PINK: None}
+        self.bishop_positions = {PColor.WHITE: set(), PColor.GREY: set(), PColor.BLACK: set(), PColor.PINK: set()}
+        self._alive = set()
+        self.bb = {col: 0 for col in PColor}
+        self.kind_bb = {kind: 0 for kind in 'KQRBNP'}
+        self.zhash = 0
+        self._zsq = [0] * (BOARD_SIZE * BOARD_SIZE)
+
+    def occupied_bits(self) -> int:
+        """Bitmask of every occupied square (union of the per-colour bitboards)."""
+        occupied = 0
+        for col_bits in self.bb.values():
+            occupied |= col_bits
+        return occupied
+
+    def outside_non_kings(self) -> int:
+        """Bitmask of the non-king pieces standing outside the 8-8."""
+        return self.occupied_bits() & OUTSIDE_MASK & ~self.kind_bb['K']
+
+    def clear_squares(self, bits: int):
+        """Empty the occupied squares of a bitmask (bit r * BOARD_SIZE + c) through set(), keeping the caches in step."""
+        for r, c in bb_squares(bits & self.occupied_bits()):
+            self.set(r, c, None)
+
+    @classmethod
+    def empty(cls) -> 'Board':
+        """A board with no pieces, built without placing (and then clearing) the starting position."""
+        b = cls.__new__(cls)
+        b.reset_empty()
+        return b
+
+    def clone(self) -> 'Board':
+        """Independent copy (pieces included) that copies the caches instead of rebuilding them."""
+        cls = type(self)
+        nb = cls.__new__(cls)
+        grid = []
+        for row in self.grid:
+            new_row = [None] * BOARD_SIZE
+            for c, p in enumerate(row):
+                if p is not None:
+                    q = Piece(p.kind, p.color)
+                    q.has_moved = p.has_moved
+                    q.tint_override = p.tint_override
+                    new_row[c] = q
+            grid.append(new_row)
+        nb.grid = grid
+        nb.king_positions = dict(self.king_positions)
+        nb.bishop_positions = {col: set(sqs) for col, sqs in self.bishop_positions.items()}
+        nb._alive = set(self._alive)
+        nb.bb = dict(self.bb)
+        nb.kind_bb = dict(self.kind_bb)
+        nb.zhash = self.zhash
+        nb._zsq = self._zsq[:]
+        return nb
+
+    def __deepcopy__(self, memo):
+        # Register the copy so a structure holding this board twice still shares one copy
+        nb = self.clone()
+        memo[id(self)] = nb
+        return nb
+
+    def dump_items(self):
+        """Return occupied squares as (r, c, kind, color_value, has_moved) tuples (snapshot form)."""
+        return [(r, c, p.kind, p.color.value, p.has_moved)
+                for r, row in enumerate(self.grid)
+                for c, p in enumerate(row) if p]
+
+    def restore_items(self, items):
+        """Replace the board contents in place from dump_items() output.
+
+        Writes the grid directly and rebuilds the caches once instead of going through
+        set() for every square (snapshot restore runs on every undo/redo/load).
+        """
+        for row in self.grid:
+            row[:] = [None] * BOARD_SIZE
+        for (r, c, kind, colv, moved) in items:
+            if is_blocked_square(r, c):
+                continue
+            q = Piece(kind, PColor(colv))
+            q.has_moved = bool(moved)
+            self.grid[r][c] = q
+        self._rebuild_piece_index()
 
     def find_bishops(self, color: PColor):
         cached = self.bishop_positions.get(color)
@@ -1244,7 +1461,9 @@ class Board:
 
     def alive_colors(self) -> List[PColor]:
 
-        return [col for col in TURN_ORDER if self.find_king(col) is not None]
+        alive = self._alive
+
+        return [col for col in TURN_ORDER if col in alive]
 
 
 
@@ -1264,15 +1483,7 @@ def init_chess_only_board() -> 'Board':
 
     """
 
-    b = Board()
-
-    # Clear everything
-
-    for rr in range(BOARD_SIZE):
-
-        for cc in range(BOARD_SIZE):
-
-            b.set(rr, cc, None)
+    b = Board.empty()
 
     # Standard chess back rank order
 
@@ -1384,742 +1595,554 @@ def add_slide_moves(board: Board, r, c, piece, dirs, out):
 
             nc += dc
 
-def gen_moves(board, r, c):
-
-    moves = []
+def _gen_knight(board, r, c, p, moves):
+    grid = board.grid
+    color = p.color
+    for nr, nc in _KNIGHT_MOVES[r * BOARD_SIZE + c]:
+        tgt = grid[nr][nc]
+        if not tgt or (tgt.color != color and tgt.kind != 'K'):
+            moves.append((nr,nc))
+    return moves
 
-    p = board.get(r, c)
 
-    if not p:
+def _gen_slider(board, p, rays, moves):
+    grid = board.grid
+    color = p.color
+    for ray in rays:
+        for nr, nc in ray:
+            tgt = grid[nr][nc]
+            if tgt:
+                if tgt.color != color and tgt.kind != 'K':
+                    moves.append((nr, nc))
+                break
+            moves.append((nr, nc))
+    return moves
 
-        return moves
 
-    kind = p.kind
+def _gen_rook(board, r, c, p, moves):
+    return _gen_slider(board, p, _ORTHO_RAYS[r * BOARD_SIZE + c], moves)
 
-    color = p.color
 
-    if kind == 'N':
+def _gen_bishop(board, r, c, p, moves):
+    return _gen_slider(board, p, _DIAG_RAYS[r * BOARD_SIZE + c], moves)
 
-        for dr, dc in [(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)]:
 
-            nr, nc = r+dr, c+dc
+def _gen_queen(board, r, c, p, moves):
+    idx = r * BOARD_SIZE + c
+    _gen_slider(board, p, _ORTHO_RAYS[idx], moves)
+    return _gen_slider(board, p, _DIAG_RAYS[idx], moves)
 
-            if board.in_bounds(nr,nc):
 
-                if is_corner_square(nr, nc):
+def _gen_king(board, r, c, p, moves):
+    grid = board.grid
+    color = p.color
+    for nr, nc in _KING_MOVES[r * BOARD_SIZE + c]:
+        tgt = grid[nr][nc]
+        if not tgt or (tgt.color != color and tgt.kind != 'K'):
+            moves.append((nr,nc))
+    # Short-game castling (ON by default): allow 2-step king move along home rank toward a rook
+    # Only when not in chess-lock; both king and rook must be unmoved; squares between must be empty;
+    # King may not be in check, pass through check, or land in check by any colour.
+    try:
+        gs_obj = globals().get('gs', None)
+        if not (gs_obj and getattr(gs_obj, 'chess_lock', False)):
+            if not p.has_moved:
+                # Determine home axis and directions for side/corner per colour
+                # Directions are unit vectors (dr,dc) along the home rank
+                if color == PColor.WHITE:
+                    axis = 'row'; idx = 11; side_dir = (0, 1); corner_dir = (0, -1)
+                elif color == PColor.BLACK:
+                    axis = 'row'; idx = 0;  side_dir = (0, -1); corner_dir = (0, 1)
+                elif color == PColor.GREY:
+                    axis = 'col'; idx = 0;  side_dir = (1, 0);  corner_dir = (-1, 0)
+                else:  # PColor.PINK
+                    axis = 'col'; idx = 11; side_dir = (-1, 0); corner_dir = (1, 0)
+                # King must be on its home axis
+                on_home = (axis == 'row' and r == idx) or (axis == 'col' and c == idx)
+                if on_home:
+                    def _castle_dir(drc):
+                        dr, dc = drc
+                        # Target squares for king movement
+                        k1r, k1c = r + dr, c + dc
+                        k2r, k2c = r + 2*dr, c + 2*dc
+                        # Both intermediate squares must be in bounds and empty
+                        if not (board.in_bounds(k1r, k1c) and board.in_bounds(k2r, k2c)):
+                            return None
+                        if board.get(k1r, k1c) or board.get(k2r, k2c):
+                            return None
+                        # Find the first piece in this direction to verify it's our rook (unmoved)
+                        srch_r, srch_c = r + 3*dr, c + 3*dc
+                        rook_sq = None
+                        while board.in_bounds(srch_r, srch_c):
+                            q = board.get(srch_r, srch_c)
+                            if q is not None:
+                                rook_sq = (srch_r, srch_c, q)
+                                break
+                            srch_r += dr
+                            srch_c += dc
+                        if not rook_sq:
+                            return None
+                        rr, rc, rq = rook_sq
+                        if not (rq.color == color and rq.kind == 'R' and not rq.has_moved):
+                            return None
+                        # Can't castle out of, through, or into check (attacked by any colour)
+                        # Also disallow entering opponent's protected corner squares
+                        # Build attackers list as any other colour with a living king
+                        attackers = [col for col in TURN_ORDER if col != color and board.find_king(col) is not None]
+                        if king_in_check(board, color):
+                            return None
+                        # Through square
+                        if is_square_attacked(board, k1r, k1c, attackers):
+                            return None
+                        # Destination square
+                        if is_square_attacked(board, k2r, k2c, attackers):
+                            return None
+                        if is_corner_square(k1r, k1c) or is_corner_square(k2r, k2c):
+                            return None
+                        return (k2r, k2c)
+                    for drc in (side_dir, corner_dir):
+                        dst = _castle_dir(drc)
+                        if dst is not None:
+                            moves.append(dst)
+    except Exception:
+        pass
+    try:
+        gs_obj = globals().get('gs')
+        if SAFE_CORNERS and gs_obj and gs_obj.corner_evict_pending.get(color, False):
+            if is_safe_square(r, c):
+                corner_key = safe_corner_id(r, c)
+                exits = exit_squares_for_corner(corner_key)
+                if exits:
+                    exit_moves = [(nr, nc) for (nr, nc) in moves if (nr, nc) in exits]
+                    if exit_moves:
+                        moves = exit_moves
+    except Exception:
+        pass
+    return moves
 
-                    continue
 
-                tgt = board.get(nr,nc)
+def _gen_pawn(board, r, c, p, moves):
+    color = p.color
+    # Determine pawn forward direction from gs.pawn_dir if present, otherwise use defaults
+    gs_obj = globals().get('gs')
+    default_dir = {PColor.WHITE: -1, PColor.BLACK: 1, PColor.GREY: 1, PColor.PINK: -1}
+    pd = default_dir.get(color, -1)
+    if gs_obj is not None:
+        pd = gs_obj.pawn_dir.get(color, pd)
+    # Map pawn direction to forward vector and capture vectors per color
+    if color in (PColor.WHITE, PColor.BLACK):
+        fwd = (pd, 0)
+        if pd == -1:
+            caps = [(-1,-1), (-1,1)]
+        else:
+            caps = [(1,-1), (1,1)]
+    else:
+        # GREY and PINK move along files (columns). pd indicates column direction (+1 rightwards, -1 leftwards)
+        fwd = (0, pd)
+        if pd == 1:
+            caps = [(-1,1), (1,1)]
+        else:
+            caps = [(-1,-1), (1,-1)]
+    nr, nc = r + fwd[0], c + fwd[1]
+    if color in (PColor.WHITE, PColor.BLACK):
+        if board.in_bounds(nr,nc) and not is_corner_square(nr, nc) and not board.get(nr,nc):
+            moves.append((nr,nc))
+            nr2, nc2 = nr + fwd[0], nc + fwd[1]
+            if (not p.has_moved and board.in_bounds(nr2,nc2)
+                and not is_corner_square(nr2, nc2) and not board.get(nr2,nc2)):
+                moves.append((nr2,nc2))
+    else:
+        if board.in_bounds(nr,nc) and not is_corner_square(nr, nc) and not board.get(nr,nc):
+            moves.append((nr,nc))
+            nr2, nc2 = nr + fwd[0], nc + fwd[1]
+            if (not p.has_moved and board.in_bounds(nr2,nc2)
+                and not is_corner_square(nr2, nc2) and not board.get(nr2,nc2)):
+                moves.append((nr2,nc2))
+    for dr, dc in caps:
+        ar, ac = r + dr, c + dc
+        if board.in_bounds(ar,ac) and not is_corner_square(ar, ac):
+            tgt = board.get(ar,ac)
+            if tgt and tgt.color != color and tgt.kind != 'K':
+                # Edge-pawn capture restriction (first round only):
+                # If BOTH attacker and target are edge pawns (w.r.t. their OWN color orientation),
+                # disallow the capture during the opening round of moves (first 4 plies).
+                gs_obj = globals().get('gs')
+                is_first_round = (gs_obj is not None and getattr(gs_obj, 'half_moves', 0) < 4)
+                if is_first_round and tgt.kind == 'P':
+                    attacker_edge = is_edge_pawn_square(r, c, color)
+                    target_edge   = is_edge_pawn_square(ar, ac, tgt.color)
+                    if attacker_edge and target_edge:
+                        # disallow this capture on first round
+                        pass
+                    else:
+                        moves.append((ar,ac))
+                else:
+                    moves.append((ar,ac))
+    return moves
 
-                if not tgt or (tgt.color != color and tgt.kind != 'K'):
 
-                    moves.append((nr,nc))
+# Pseudo-legal generator per piece kind: gen(board, r, c, piece, moves) appends (er, ec) targets
+# and returns the list (the king generator may hand back a filtered one for corner eviction).
+_MOVE_GEN = {'N': _gen_knight, 'K': _gen_king, 'R': _gen_rook, 'B': _gen_bishop, 'Q': _gen_queen, 'P': _gen_pawn}
 
-    elif kind == 'K':
 
-        for dr in (-1,0,1):
+def gen_moves(board, r, c):
+    moves = []
+    p = board.get(r, c)
+    if not p:
+        return moves
+    return _MOVE_GEN[p.kind](board, r, c, p, moves)
 
-            for dc in (-1,0,1):
+    if cap and not simulate:
 
-                if dr == 0 and dc == 0: continue
+        try:
 
-                nr, nc = r+dr, c+dc
+            log(f"[CAPTURE] {mover.color.name} {mover.kind} x {cap.color.name} {cap.kind} at ({er},{ec})")
 
-                if not board.in_bounds(nr,nc): continue
+        except Exception:
 
-                if is_blocked_square(nr, nc):
-                    continue
+            pass
 
-                tgt = board.get(nr,nc)
+    # If this was a real move (not simulate), update GameState half-move counter and handle corner rules
 
-                if not tgt or (tgt.color != color and tgt.kind != 'K'):
+    if not simulate:
 
-                    moves.append((nr,nc))
+        gs_obj = globals().get('gs')
 
-        # Short-game castling (ON by default): allow 2-step king move along home rank toward a rook
+        if gs_obj is not None:
 
-        # Only when not in chess-lock; both king and rook must be unmoved; squares between must be empty;
+            gs_obj.half_moves += 1
 
-        # King may not be in check, pass through check, or land in check by any colour.
+        # record recent move for repetition/ping-pong detection
 
         try:
 
-            gs_obj = globals().get('gs', None)
+            if gs_obj is not None:
 
-            if not (gs_obj and getattr(gs_obj, 'chess_lock', False)):
+                gs_obj.recent_moves.append((mover.color if mover else None, sr, sc, er, ec))
 
-                if not p.has_moved:
+        except Exception:
 
-                    # Determine home axis and directions for side/corner per colour
+            pass
 
-                    # Directions are unit vectors (dr,dc) along the home rank
+        # Update position repetition counts and detect threefold repetition
 
-                    if color == PColor.WHITE:
+        try:
 
-                        axis = 'row'; idx = 11; side_dir = (0, 1); corner_dir = (0, -1)
+            if gs_obj is not None:
 
-                    elif color == PColor.BLACK:
+                key = gs_obj._position_key(board)
 
-                        axis = 'row'; idx = 0;  side_dir = (0, -1); corner_dir = (0, 1)
+                prev = gs_obj.pos_counts.get(key, 0)
 
-                    elif color == PColor.GREY:
+                gs_obj.pos_counts[key] = prev + 1
 
-                        axis = 'col'; idx = 0;  side_dir = (1, 0);  corner_dir = (-1, 0)
+                if gs_obj.pos_counts[key] >= 3:
 
-                    else:  # PColor.PINK
+                    # Threefold repetition reached -> set game over state as draw
 
-                        axis = 'col'; idx = 11; side_dir = (-1, 0); corner_dir = (1, 0)
+                    gs_obj.freeze_advance = True
 
-                    # King must be on its home axis
+                    gs_obj.post_move_delay_until = 0
 
-                    on_home = (axis == 'row' and r == idx) or (axis == 'col' and c == idx)
+                    gs_obj.elim_flash_color = None
 
-                    if on_home:
+                    # Use a sentinel value to indicate draw (None winner)
 
-                        def _castle_dir(drc):
+                    gs_obj._draw_by_repetition = True
 
-                            dr, dc = drc
+                    log(f"[DRAW] threefold repetition detected (key={key})")
 
-                            # Target squares for king movement
+        except Exception:
 
-                            k1r, k1c = r + dr, c + dc
+            pass
 
-                            k2r, k2c = r + 2*dr, c + 2*dc
+        # After a real move, check whether we should activate two-stage migration
 
-                            # Both intermediate squares must be in bounds and empty
+        try:
 
-                            if not (board.in_bounds(k1r, k1c) and board.in_bounds(k2r, k2c)):
+            gs_obj = globals().get('gs')
 
-                                return None
+            if gs_obj is not None:
 
-                            if board.get(k1r, k1c) or board.get(k2r, k2c):
+                activate_two_stage_if_needed(board, gs_obj)
 
-                                return None
+        except Exception:
 
-                            # Find the first piece in this direction to verify it's our rook (unmoved)
+            # Protect against activation errors during headless tests
 
-                            srch_r, srch_c = r + 3*dr, c + 3*dc
+            pass
 
-                            rook_sq = None
+        if gs_obj is not None:
 
-                            while board.in_bounds(srch_r, srch_c):
+            if mover_is_king and mover and end_in_safe and not start_in_safe:
 
-                                q = board.get(srch_r, srch_c)
+                _handle_corner_entry(board, gs_obj, mover.color)
 
-                                if q is not None:
+            for col in TURN_ORDER:
 
-                                    rook_sq = (srch_r, srch_c, q)
+                _update_corner_state(board, gs_obj, col)
 
-                                    break
+    # Final verification debug
 
-                                srch_r += dr
+    try:
 
-                                srch_c += dc
+        if not simulate:
 
-                            if not rook_sq:
+            final_dst = board.get(er, ec)
 
-                                return None
+            final_src = board.get(sr, sc)
 
-                            rr, rc, rq = rook_sq
+            print(f"[DO_MOVE] final verification src={('present' if final_src else 'empty')} dst={(final_dst.kind if final_dst else None, final_dst.color.name if final_dst else None)}")
 
-                            if not (rq.color == color and rq.kind == 'R' and not rq.has_moved):
+    except Exception:
 
-                                return None
+        pass
 
-                            # Can't castle out of, through, or into check (attacked by any colour)
+    return cap, prev_has, prev_kind, effects
 
-                            # Also disallow entering opponent's protected corner squares
 
-                            # Build attackers list as any other colour with a living king
 
-                            attackers = [col for col in TURN_ORDER if col != color and board.find_king(col) is not None]
+# ====== TRUE CHECK & LEGAL FILTER ======
 
-                            if king_in_check(board, color):
+# ----- Attack geometry (index r * BOARD_SIZE + c) -----
+# Corner squares never change, so the squares a knight/king reaches and the rays a slider
+# travels (cut at the board edge or the first corner square) are fixed per square.
+def _attack_ray(r: int, c: int, dr: int, dc: int):
+    ray = []
+    rr, cc = r + dr, c + dc
+    while 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE and not is_corner_square(rr, cc):
+        ray.append((rr, cc))
+        rr += dr; cc += dc
+    return tuple(ray)
 
-                                return None
 
-                            # Through square
+def _attack_steps(r: int, c: int, deltas):
+    return tuple((r + dr, c + dc) for dr, dc in deltas
+                 if 0 <= r + dr < BOARD_SIZE and 0 <= c + dc < BOARD_SIZE)
 
-                            if is_square_attacked(board, k1r, k1c, attackers):
 
-                                return None
+_KNIGHT_DELTAS = ((2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2))
+_KING_DELTAS = tuple((dr, dc) for dr in (-1,0,1) for dc in (-1,0,1) if dr or dc)
+_ALL_SQUARES = [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)]
+_KNIGHT_STEPS = tuple(_attack_steps(r, c, _KNIGHT_DELTAS) for r, c in _ALL_SQUARES)
+_KING_STEPS = tuple(_attack_steps(r, c, _KING_DELTAS) for r, c in _ALL_SQUARES)
+# Move targets (as opposed to attack sources): knights skip every corner square, kings the blocked ones
+_KNIGHT_MOVES = tuple(tuple(sq for sq in steps if not is_corner_square(*sq)) for steps in _KNIGHT_STEPS)
+_KING_MOVES = tuple(tuple(sq for sq in steps if not is_blocked_square(*sq)) for steps in _KING_STEPS)
+_ORTHO_RAYS = tuple(tuple(ray for ray in (_attack_ray(r, c, dr, dc) for dr, dc in ((1,0),(-1,0),(0,1),(0,-1))) if ray)
+                    for r, c in _ALL_SQUARES)
+_DIAG_RAYS = tuple(tuple(ray for ray in (_attack_ray(r, c, dr, dc) for dr, dc in ((1,1),(1,-1),(-1,1),(-1,-1))) if ray)
+                   for r, c in _ALL_SQUARES)
+_PAWN_DEFAULT_DIR = {PColor.WHITE: -1, PColor.BLACK: 1, PColor.GREY: 1, PColor.PINK: -1}
 
-                            # Destination square
 
-                            if is_square_attacked(board, k2r, k2c, attackers):
 
-                                return None
+def is_square_attacked(board: Board, r: int, c: int, attackers: List[PColor]) -> bool:
+    grid = board.grid
+    idx = r * BOARD_SIZE + c
+    # Pieces on a corner square can only be reached by sliders
+    on_corner = is_corner_square(r, c)
+    if not on_corner:
+        # Pawn attacks
+        gs_obj = globals().get('gs')
+        for col in attackers:
+            # Determine pawn capture deltas according to pawn_dir settings
+            pd = _PAWN_DEFAULT_DIR.get(col, -1)
+            if gs_obj is not None:
+                pd = gs_obj.pawn_dir.get(col, pd)
+            if col in (PColor.WHITE, PColor.BLACK):
+                rr = r + pd
+                sources = ((rr, c - 1), (rr, c + 1))
+            else:
+                # GREY / PINK: column-moving pawns
+                cc = c + pd
+                sources = ((r - 1, cc), (r + 1, cc))
+            for rr, cc in sources:
+                if 0 <= rr < BOARD_SIZE and 0 <= cc < BOARD_SIZE:
+                    p = grid[rr][cc]
+                    if p and p.color == col and p.kind == 'P':
+                        return True
+        # Knights
+        for rr, cc in _KNIGHT_STEPS[idx]:
+            p = grid[rr][cc]
+            if p and p.kind == 'N' and p.color in attackers:
+                return True
+        # Kings (adjacent)
+        for rr, cc in _KING_STEPS[idx]:
+            p = grid[rr][cc]
+            if p and p.kind == 'K' and p.color in attackers:
+                return True
+    # Sliding (rook/queen)
+    for ray in _ORTHO_RAYS[idx]:
+        for rr, cc in ray:
+            p = grid[rr][cc]
+            if p:
+                if (p.kind == 'R' or p.kind == 'Q') and p.color in attackers:
+                    return True
+                break
+    # Sliding (bishop/queen)
+    for ray in _DIAG_RAYS[idx]:
+        for rr, cc in ray:
+            p = grid[rr][cc]
+            if p:
+                if (p.kind == 'B' or p.kind == 'Q') and p.color in attackers:
+                    return True
+                break
+    return False
 
-                            if is_corner_square(k1r, k1c) or is_corner_square(k2r, k2c):
-                                return None
 
-                            return (k2r, k2c)
 
-                        for drc in (side_dir, corner_dir):
+def king_in_check(board: Board, color: PColor) -> bool:
 
-                            dst = _castle_dir(drc)
+    kp = board.find_king(color)
 
-                            if dst is not None:
+    if not kp:
 
-                                moves.append(dst)
+        return False
 
-        except Exception:
+    gs_obj = globals().get('gs')
 
-            pass
+    if SAFE_CORNERS and gs_obj and gs_obj.corner_immune.get(color, False):
 
-        try:
+        return False
 
-            gs_obj = globals().get('gs')
+    r, c = kp
 
-            if SAFE_CORNERS and gs_obj and gs_obj.corner_evict_pending.get(color, False):
-                if is_safe_square(r, c):
-                    corner_key = safe_corner_id(r, c)
-                    exits = exit_squares_for_corner(corner_key)
-                    if exits:
-                        exit_moves = [(nr, nc) for (nr, nc) in moves if (nr, nc) in exits]
-                        if exit_moves:
-                            moves = exit_moves
+    # Fast attacker list using cached king positions
 
-        except Exception:
+    attackers = []
 
-            pass
+    for col in TURN_ORDER:
 
-    elif kind == 'R':
+        if col == color: continue
 
-        add_slide_moves(board, r, c, p, [(1,0),(-1,0),(0,1),(0,-1)], moves)
+        if board.king_positions.get(col) is not None:
 
-    elif kind == 'B':
+            attackers.append(col)
 
-        add_slide_moves(board, r, c, p, [(1,1),(1,-1),(-1,1),(-1,-1)], moves)
+        else:
 
-    elif kind == 'Q':
+            # fallback: check existence
 
-        add_slide_moves(board, r, c, p, [(1,0),(-1,0),(0,1),(0,-1),(1,1),(1,-1),(-1,1),(-1,-1)], moves)
+            if board.find_king(col) is not None:
 
-    elif kind == 'P':
+                attackers.append(col)
 
-        # Determine pawn forward direction from gs.pawn_dir if present, otherwise use defaults
+    return is_square_attacked(board, r, c, attackers)
 
-        gs_obj = globals().get('gs')
+    loc = board.find_king(color)
 
-        default_dir = {PColor.WHITE: -1, PColor.BLACK: 1, PColor.GREY: 1, PColor.PINK: -1}
+    if not loc:
 
-        pd = default_dir.get(color, -1)
+        return False
 
-        if gs_obj is not None:
+    r,c = loc
 
-            pd = gs_obj.pawn_dir.get(color, pd)
+    attackers = [col for col in TURN_ORDER if col != color and board.find_king(col) is not None]
 
-        # Map pawn direction to forward vector and capture vectors per color
+    return is_square_attacked(board, r, c, attackers)
 
-        if color in (PColor.WHITE, PColor.BLACK):
 
-            fwd = (pd, 0)
 
-            if pd == -1:
+def check_victims(board: Board, mover: PColor) -> List[PColor]:
+    """Alive colours other than `mover` whose king is attacked, in turn order.
 
-                caps = [(-1,-1), (-1,1)]
+    Same answer as calling king_in_check per colour, but the alive list is read once and
+    each king square comes straight from the cache.
+    """
+    alive = board.alive_colors()
+    gs_obj = globals().get('gs')
+    victims = []
+    for col in alive:
+        if col == mover:
+            continue
+        if SAFE_CORNERS and gs_obj and gs_obj.corner_immune.get(col, False):
+            continue
+        kp = board.find_king(col)
+        if kp and is_square_attacked(board, kp[0], kp[1], [a for a in alive if a != col]):
+            victims.append(col)
+    return victims
 
-            else:
 
-                caps = [(1,-1), (1,1)]
 
-        else:
+# ====== MOVE APPLY/UNDO (safe wrappers for simulation) ======
 
-            # GREY and PINK move along files (columns). pd indicates column direction (+1 rightwards, -1 leftwards)
+def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
-            fwd = (0, pd)
+    mover = board.get(sr, sc)
 
-            if pd == 1:
+    cap   = board.get(er, ec)
 
-                caps = [(-1,1), (1,1)]
+    prev_has = mover.has_moved if mover else False
 
-            else:
+    prev_kind = mover.kind if mover else None
 
-                caps = [(-1,-1), (1,-1)]
+    mover_is_king = (prev_kind == 'K')
 
-        nr, nc = r + fwd[0], c + fwd[1]
+    if is_corner_square(sr, sc):
+        if simulate:
+            return None, False, None, {}
+        raise ValueError("Illegal move from blocked corner square")
 
-        if color in (PColor.WHITE, PColor.BLACK):
+    if is_corner_square(er, ec):
+        if simulate:
+            return None, False, None, {}
+        raise ValueError("Illegal move into blocked corner square")
 
-            if board.in_bounds(nr,nc) and not is_corner_square(nr, nc) and not board.get(nr,nc):
+    start_in_safe = is_safe_square(sr, sc) if mover_is_king else False
 
-                moves.append((nr,nc))
+    end_in_safe = is_safe_square(er, ec) if mover_is_king else False
 
-                nr2, nc2 = nr + fwd[0], nc + fwd[1]
+    effects = {}
 
-                if (not p.has_moved and board.in_bounds(nr2,nc2)
 
-                    and not is_corner_square(nr2, nc2) and not board.get(nr2,nc2)):
 
-                    moves.append((nr2,nc2))
+    gs_local = globals().get('gs', None)
 
-        else:
+    chess_lock_active = bool(gs_local and getattr(gs_local, 'chess_lock', False))
 
-            if board.in_bounds(nr,nc) and not is_corner_square(nr, nc) and not board.get(nr,nc):
+    if chess_lock_active and not (_IN_CHESS_LUT[sr * BOARD_SIZE + sc] and _IN_CHESS_LUT[er * BOARD_SIZE + ec]):
 
-                moves.append((nr,nc))
+        if simulate:
 
-                nr2, nc2 = nr + fwd[0], nc + fwd[1]
+            return None, False, None, {}
 
-                if (not p.has_moved and board.in_bounds(nr2,nc2)
+        raise ValueError(f"Illegal duel move outside 8x8: {(sr, sc)} -> {(er, ec)}")
 
-                    and not is_corner_square(nr2, nc2) and not board.get(nr2,nc2)):
+    if mover_is_king and end_in_safe and not start_in_safe:
 
-                    moves.append((nr2,nc2))
+        if chess_lock_active:
 
-        for dr, dc in caps:
+            if simulate:
 
-            ar, ac = r + dr, c + dc
+                return None, False, None, {}
 
-            if board.in_bounds(ar,ac) and not is_corner_square(ar, ac):
+            raise ValueError("Illegal safe-square entry during duel")
 
-                tgt = board.get(ar,ac)
+        if any_other_king_in_safe(board, mover.color):
 
-                if tgt and tgt.color != color and tgt.kind != 'K':
+            if simulate:
 
-                    # Edge-pawn capture restriction (first round only):
+                return None, False, None, {}
 
-                    # If BOTH attacker and target are edge pawns (w.r.t. their OWN color orientation),
+            raise ValueError("Illegal safe-square entry: another king already safe")
 
-                    # disallow the capture during the opening round of moves (first 4 plies).
+        if not has_two_bishops(board, mover.color):
 
-                    gs_obj = globals().get('gs')
+            if simulate:
 
-                    is_first_round = (gs_obj is not None and getattr(gs_obj, 'half_moves', 0) < 4)
+                return None, False, None, {}
 
-                    if is_first_round and tgt.kind == 'P':
+            raise ValueError("Illegal safe-square entry: both bishops required")
 
-                        attacker_edge = is_edge_pawn_square(r, c, color)
 
-                        target_edge   = is_edge_pawn_square(ar, ac, tgt.color)
 
-                        if attacker_edge and target_edge:
+    # Remove mover from source and place at destination (even during simulation)
 
-                            # disallow this capture on first round
+    board.set(sr, sc, None)
 
-                            pass
-
-                        else:
-
-                            moves.append((ar,ac))
-
-                    else:
-
-                        moves.append((ar,ac))
-
-    return moves
-
-    if cap and not simulate:
-
-        try:
-
-            log(f"[CAPTURE] {mover.color.name} {mover.kind} x {cap.color.name} {cap.kind} at ({er},{ec})")
-
-        except Exception:
-
-            pass
-
-    # If this was a real move (not simulate), update GameState half-move counter and handle corner rules
-
-    if not simulate:
-
-        gs_obj = globals().get('gs')
-
-        if gs_obj is not None:
-
-            gs_obj.half_moves += 1
-
-        # record recent move for repetition/ping-pong detection
-
-        try:
-
-            if gs_obj is not None:
-
-                gs_obj.recent_moves.append((mover.color if mover else None, sr, sc, er, ec))
-
-        except Exception:
-
-            pass
-
-        # Update position repetition counts and detect threefold repetition
-
-        try:
-
-            if gs_obj is not None:
-
-                key = gs_obj._position_key(board)
-
-                prev = gs_obj.pos_counts.get(key, 0)
-
-                gs_obj.pos_counts[key] = prev + 1
-
-                if gs_obj.pos_counts[key] >= 3:
-
-                    # Threefold repetition reached -> set game over state as draw
-
-                    gs_obj.freeze_advance = True
-
-                    gs_obj.post_move_delay_until = 0
-
-                    gs_obj.elim_flash_color = None
-
-                    # Use a sentinel value to indicate draw (None winner)
-
-                    gs_obj._draw_by_repetition = True
-
-                    log(f"[DRAW] threefold repetition detected (key={key})")
-
-        except Exception:
-
-            pass
-
-        # After a real move, check whether we should activate two-stage migration
-
-        try:
-
-            gs_obj = globals().get('gs')
-
-            if gs_obj is not None:
-
-                activate_two_stage_if_needed(board, gs_obj)
-
-        except Exception:
-
-            # Protect against activation errors during headless tests
-
-            pass
-
-        if gs_obj is not None:
-
-            if mover_is_king and mover and end_in_safe and not start_in_safe:
-
-                _handle_corner_entry(board, gs_obj, mover.color)
-
-            for col in TURN_ORDER:
-
-                _update_corner_state(board, gs_obj, col)
-
-    # Final verification debug
-
-    try:
-
-        if not simulate:
-
-            final_dst = board.get(er, ec)
-
-            final_src = board.get(sr, sc)
-
-            print(f"[DO_MOVE] final verification src={('present' if final_src else 'empty')} dst={(final_dst.kind if final_dst else None, final_dst.color.name if final_dst else None)}")
-
-    except Exception:
-
-        pass
-
-    return cap, prev_has, prev_kind, effects
-
-
-
-# ====== TRUE CHECK & LEGAL FILTER ======
-
-def is_square_attacked(board: Board, r: int, c: int, attackers: List[PColor]) -> bool:
-
-    # Pawn attacks
-
-    for col in attackers:
-
-        # Determine pawn capture deltas according to pawn_dir settings
-
-        gs_obj = globals().get('gs')
-
-        default_dir = {PColor.WHITE: -1, PColor.BLACK: 1, PColor.GREY: 1, PColor.PINK: -1}
-
-        pd = default_dir.get(col, -1)
-
-        if gs_obj is not None:
-
-            pd = gs_obj.pawn_dir.get(col, pd)
-
-        if col in (PColor.WHITE, PColor.BLACK):
-
-            if pd == -1:
-
-                deltas = [(-1,-1), (-1,1)]
-
-            else:
-
-                deltas = [(1,-1), (1,1)]
-
-            for dr,dc in deltas:
-
-                rr, cc = r+dr, c+dc
-
-                if board.in_bounds(rr,cc):
-
-                    p = board.get(rr,cc)
-
-                    if p and p.color==col and p.kind=='P' and not is_corner_square(r,c) and abs(cc-c)==1:
-
-                        return True
-
-        else:
-
-            # GREY / PINK: column-moving pawns
-
-            if pd == 1:
-
-                deltas = [(-1,1),(1,1)]
-
-            else:
-
-                deltas = [(-1,-1),(1,-1)]
-
-            for dr,dc in deltas:
-
-                rr, cc = r+dr, c+dc
-
-                if board.in_bounds(rr,cc):
-
-                    p = board.get(rr,cc)
-
-                    if p and p.color==col and p.kind=='P' and not is_corner_square(r,c) and abs(rr-r)==1:
-
-                        return True
-
-
-
-    # Knights
-
-    for dr,dc in [(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)]:
-
-        rr, cc = r+dr, c+dc
-
-        if board.in_bounds(rr,cc):
-
-            if is_corner_square(r,c):
-
-                continue
-
-            p = board.get(rr,cc)
-
-            if p and p.color in attackers and p.kind=='N':
-
-                return True
-
-
-
-    # Sliding (rook/queen)
-
-    for dr,dc in [(1,0),(-1,0),(0,1),(0,-1)]:
-
-        rr, cc = r+dr, c+dc
-
-        while board.in_bounds(rr,cc):
-
-            if is_corner_square(rr,cc):
-
-                break
-
-            p = board.get(rr,cc)
-
-            if p:
-
-                if p.color in attackers and (p.kind=='R' or p.kind=='Q'):
-
-                    return True
-
-                break
-
-            rr += dr; cc += dc
-
-
-
-    # Sliding (bishop/queen)
-
-    for dr,dc in [(1,1),(1,-1),(-1,1),(-1,-1)]:
-
-        rr, cc = r+dr, c+dc
-
-        while board.in_bounds(rr,cc):
-
-            if is_corner_square(rr,cc):
-
-                break
-
-            p = board.get(rr,cc)
-
-            if p:
-
-                if p.color in attackers and (p.kind=='B' or p.kind=='Q'):
-
-                    return True
-
-                break
-
-            rr += dr; cc += dc
-
-
-
-    # Kings (adjacent)
-
-    for dr in (-1,0,1):
-
-        for dc in (-1,0,1):
-
-            if dr==0 and dc==0: continue
-
-            rr, cc = r+dr, c+dc
-
-            if not board.in_bounds(rr,cc): continue
-
-            if is_corner_square(r,c):
-
-                continue
-
-            p = board.get(rr,cc)
-
-            if p and p.color in attackers and p.kind=='K':
-
-                return True
-
-
-
-    return False
-
-
-
-
-
-def king_in_check(board: Board, color: PColor) -> bool:
-
-    kp = board.find_king(color)
-
-    if not kp:
-
-        return False
-
-    gs_obj = globals().get('gs')
-
-    if SAFE_CORNERS and gs_obj and gs_obj.corner_immune.get(color, False):
-
-        return False
-
-    r, c = kp
-
-    # Fast attacker list using cached king positions
-
-    attackers = []
-
-    for col in TURN_ORDER:
-
-        if col == color: continue
-
-        if board.king_positions.get(col) is not None:
-
-            attackers.append(col)
-
-        else:
-
-            # fallback: check existence
-
-            if board.find_king(col) is not None:
-
-                attackers.append(col)
-
-    return is_square_attacked(board, r, c, attackers)
-
-    loc = board.find_king(color)
-
-    if not loc:
-
-        return False
-
-    r,c = loc
-
-    attackers = [col for col in TURN_ORDER if col != color and board.find_king(col) is not None]
-
-    return is_square_attacked(board, r, c, attackers)
-
-
-
-# ====== MOVE APPLY/UNDO (safe wrappers for simulation) ======
-
-def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
-
-    mover = board.get(sr, sc)
-
-    cap   = board.get(er, ec)
-
-    prev_has = mover.has_moved if mover else False
-
-    prev_kind = mover.kind if mover else None
-
-    mover_is_king = (prev_kind == 'K')
-
-    if is_corner_square(sr, sc):
-        if simulate:
-            return None, False, None, {}
-        raise ValueError("Illegal move from blocked corner square")
-
-    if is_corner_square(er, ec):
-        if simulate:
-            return None, False, None, {}
-        raise ValueError("Illegal move into blocked corner square")
-
-    start_in_safe = is_safe_square(sr, sc) if mover_is_king else False
-
-    end_in_safe = is_safe_square(er, ec) if mover_is_king else False
-
-    effects = {}
-
-
-
-    gs_local = globals().get('gs', None)
-
-    chess_lock_active = bool(gs_local and getattr(gs_local, 'chess_lock', False))
-
-    if chess_lock_active and (not _in8(sr, sc) or not _in8(er, ec)):
-
-        if simulate:
-
-            return None, False, None, {}
-
-        raise ValueError(f"Illegal duel move outside 8x8: {(sr, sc)} -> {(er, ec)}")
-
-    if mover_is_king and end_in_safe and not start_in_safe:
-
-        if chess_lock_active:
-
-            if simulate:
-
-                return None, False, None, {}
-
-            raise ValueError("Illegal safe-square entry during duel")
-
-        if any_other_king_in_safe(board, mover.color):
-
-            if simulate:
-
-                return None, False, None, {}
-
-            raise ValueError("Illegal safe-square entry: another king already safe")
-
-        if not has_two_bishops(board, mover.color):
-
-            if simulate:
-
-                return None, False, None, {}
-
-            raise ValueError("Illegal safe-square entry: both bishops required")
-
-
-
-    # Remove mover from source and place at destination (even during simulation)
-
-    board.set(sr, sc, None)
-
-    if mover:
+    if mover:
 
         board.set(er, ec, mover)
 
@@ -2172,6 +2195,8 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
                 if not simulate: log(f"[PROMOTION] {mover.color.name} PQ at ({er},{ec})")
 
+        board.refresh_square(er, ec)
+
     # Detect short-game castling (non-engine path): king moves exactly two squares along its home axis
 
     try:
@@ -2230,6 +2255,8 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
                         rq.has_moved = True
 
+                        board.refresh_square(r_er, r_ec)
+
     except Exception:
 
         pass
@@ -2345,12 +2372,32 @@ def board_undo_move(board: Board, sr, sc, er, ec, captured, prev_has_moved, prev
 
             mover.kind = prev_kind
 
+        board.refresh_square(sr, sc)
+
 
 
 # ====== LEGAL MOVE FILTER (uses true check) ======
 
 
 
+# Legal move lists memoised on (Board.zhash, square, rule context); see _legal_cache_ctx
+_legal_cache = {}
+_LEGAL_CACHE_MAX = 20000
+
+
+
+def _legal_cache_ctx():
+    """Game-state inputs besides the placement that legal move generation reads."""
+    gs_obj = globals().get('gs')
+    if gs_obj is None:
+        return None
+    pawn_dir = getattr(gs_obj, 'pawn_dir', None) or {}
+    return (bool(getattr(gs_obj, 'chess_lock', False)),
+            getattr(gs_obj, 'half_moves', 0) < 4,   # first-round edge-pawn capture rule
+            tuple(pawn_dir.get(col) for col in TURN_ORDER))
+
+
+
 def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[PColor]=None) -> list:
 
     """Return all legal moves for the piece at (r, c), filtering out moves that leave king in check.
@@ -2363,30 +2410,78 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
         return []
 
+    # Safe-corner rules read per-colour corner state, so only cache without them
+    key = None
+    if not SAFE_CORNERS:
+        key = (board.zhash, r, c, _legal_cache_ctx())
+        hit = _legal_cache.get(key)
+        if hit is not None:
+            return list(hit)
+
     color = p.color
 
     pseudo = gen_moves(board, r, c)
 
     out = []
 
-    for (er, ec) in pseudo:
-        if is_corner_square(er, ec):
-            continue
+    gs_obj = globals().get('gs')
+    if not SAFE_CORNERS and not (gs_obj and getattr(gs_obj, 'chess_lock', False)):
+        # Lean make/unmake: whether the own king ends up attacked depends only on which squares
+        # hold which pieces, so swap the two grid cells and probe the king square directly
+        # instead of running the full simulated move (caches, hash, promotion bookkeeping).
+        grid = board.grid
+        is_king = p.kind == 'K'
+        kp = None if is_king else board.find_king(color)
+        attackers = [col for col in board.alive_colors() if col != color]
+        for (er, ec) in pseudo:
+            if is_corner_square(er, ec):
+                continue
+            cap = grid[er][ec]
+            grid[er][ec] = p
+            grid[r][c] = None
+            if is_king:
+                illegal = is_square_attacked(board, er, ec, attackers)
+            else:
+                illegal = kp is not None and is_square_attacked(board, kp[0], kp[1], attackers)
+            grid[r][c] = p
+            grid[er][ec] = cap
+            if not illegal:
+                out.append((r, c, er, ec))
 
-        cap, prev_has, prev_kind, eff = board_do_move(board, r, c, er, ec, simulate=True)
+    else:
+
+        for (er, ec) in pseudo:
+            if is_corner_square(er, ec):
+                continue
+
+            cap, prev_has, prev_kind, eff = board_do_move(board, r, c, er, ec, simulate=True)
 
-        illegal = king_in_check(board, color)
+            illegal = king_in_check(board, color)
 
-        board_undo_move(board, r, c, er, ec, cap, prev_has, prev_kind, eff)
+            board_undo_move(board, r, c, er, ec, cap, prev_has, prev_kind, eff)
 
-        if not illegal:
+            if not illegal:
 
-            out.append((r, c, er, ec))
+                out.append((r, c, er, ec))
+
+    if key is not None:
+        if len(_legal_cache) >= _LEGAL_CACHE_MAX:
+            _legal_cache.clear()
+        _legal_cache[key] = tuple(out)
 
     return out
 
 
 
+def legal_destinations_bb(board: Board, r: int, c: int, active_color: Optional[PColor]=None) -> int:
+    """Destinations of the legal moves from (r, c) as a square bitmask (bit r * BOARD_SIZE + c)."""
+    bits = 0
+    for m in legal_moves_for_piece(board, r, c, active_color):
+        bits |= 1 << (m[-2] * BOARD_SIZE + m[-1])
+    return bits
+
+
+
 def all_legal_moves_for_color(board: Board, color: PColor):
 
     """Collect all legal moves for a color, normalizing to 4-tuples (sr,sc,er,ec).
@@ -2397,31 +2492,26 @@ def all_legal_moves_for_color(board: Board, color: PColor):
 
     moves = []
 
-    for r in range(BOARD_SIZE):
-
-        for c in range(BOARD_SIZE):
-
-            p = board.get(r, c)
-
-            if p is not None and p.color == color:
+    # Only this colour's squares, in the same row-major order as a full-board scan
+    for r, c in bb_squares(board.bb[color]):
 
-                plist = legal_moves_for_piece(board, r, c, color)
+        plist = legal_moves_for_piece(board, r, c, color)
 
-                if not plist:
+        if not plist:
 
-                    continue
+            continue
 
-                # Normalize shape
+        # Normalize shape
 
-                first = plist[0]
+        first = plist[0]
 
-                if isinstance(first, (list, tuple)) and len(first) == 2:
+        if isinstance(first, (list, tuple)) and len(first) == 2:
 
-                    moves.extend([(r, c, er, ec) for (er, ec) in plist])
+            moves.extend([(r, c, er, ec) for (er, ec) in plist])
 
-                else:
+        else:
 
-                    moves.extend(plist)
+            moves.extend(plist)
 
     return moves
 
@@ -2469,6 +2559,13 @@ class _DuelSearchTimeout(Exception):
 
 
 
+# Duel transposition table, kept across moves (flags as _AI_TT):
+# (transposition key, root colour, eval bias) -> (depth, value, flag, best_move)
+_DUEL_TT = {}
+_DUEL_TT_MAX = 200000
+
+
+
 
 
 def _mirror_square_index(sq: int) -> int:
@@ -2733,6 +2830,30 @@ def choose_duel_move(board: Board, color: PColor, base_time_ms: int):
 
 
 
+        # python-chess's own repetition key (placement, turn, castling, ep): ~30x cheaper than polyglot hashing
+
+        key = (cb._transposition_key(), root_color, eval_bias)
+
+        entry = _DUEL_TT.get(key)
+
+        if entry is not None:
+
+            e_depth, e_value, e_flag, e_move = entry
+
+            if e_depth >= depth:
+
+                if e_flag == _TT_EXACT or (e_flag == _TT_LOWER and e_value >= beta) or (e_flag == _TT_UPPER and e_value <= alpha):
+
+                    return e_value, e_move
+
+            if pv_hint is None:
+
+                pv_hint = e_move
+
+        alpha0 = alpha
+
+
+
         legal = list(cb.legal_moves)
 
         if not legal:
@@ -2785,6 +2906,14 @@ def choose_duel_move(board: Board, color: PColor, base_time_ms: int):
 
 
 
+        flag = _TT_UPPER if value <= alpha0 else (_TT_LOWER if value >= beta else _TT_EXACT)
+
+        if len(_DUEL_TT) >= _DUEL_TT_MAX:
+
+            _DUEL_TT.clear()
+
+        _DUEL_TT[key] = (depth, value, flag, best)
+
         return value, best
 
 
@@ -2941,7 +3070,7 @@ def eval_board(board: Board, me: PColor, two_stage=False) -> int:
 
 def _alive_next_color(board: Board, color: PColor) -> PColor:
 
-    idx = TURN_ORDER.index(color)
+    idx = TURN_INDEX[color]
 
     for i in range(1, 5):
 
@@ -2996,16 +3125,13 @@ def activate_two_stage_if_needed(board: Board, gs):
 
 
 def _remove_color_pieces(board: Board, color: PColor) -> bool:
-    removed = False
-    for rr in range(BOARD_SIZE):
-        for cc in range(BOARD_SIZE):
-            piece = board.get(rr, cc)
-            if piece and piece.color == color:
-                board.set(rr, cc, None)
-                removed = True
+    bits = board.bb[color]
+    removed = bool(bits)
+    board.clear_squares(bits)
     if removed:
         try:
             board.king_positions[color] = None  # type: ignore[attr-defined]
+            board._alive.discard(color)
             if hasattr(board, 'bishop_positions'):
                 board.bishop_positions[color] = set()
         except Exception:
@@ -3096,21 +3222,13 @@ def perform_two_stage_migration(board: Board, gs, alive_colors):
 
     # Remove non-king pieces outside 8x8
 
-    for rr in range(BOARD_SIZE):
-
-        for cc in range(BOARD_SIZE):
-
-            p = board.get(rr, cc)
-
-            if p and p.kind != 'K' and not in_chess_area(rr, cc):
-
-                board.set(rr, cc, None)
+    board.clear_squares(board.outside_non_kings())
 
     # Determine diagonal/opposite pairing: use TURN_ORDER indices
 
     a, b = alive_colors[0], alive_colors[1]
 
-    idx_a = TURN_ORDER.index(a); idx_b = TURN_ORDER.index(b)
+    idx_a = TURN_INDEX[a]; idx_b = TURN_INDEX[b]
 
     # Opposite if (idx_a + 2) % 4 == idx_b
 
@@ -3148,9 +3266,9 @@ def _approach_terms(board: Board, sr, sc, er, ec) -> Tuple[int,int]:
 
     mover = board.get(sr, sc)
 
-    start_d = dist_to_chess(sr, sc)
+    start_d = _DIST_LUT[sr * BOARD_SIZE + sc]
 
-    end_d   = dist_to_chess(er, ec)
+    end_d   = _DIST_LUT[er * BOARD_SIZE + ec]
 
     improve = start_d - end_d
 
@@ -3182,7 +3300,7 @@ def choose_ai_move_fast(board: Board, color: PColor, two_stage: bool, must_enter
 
             if two_stage and color in (gs_obj.final_a, gs_obj.final_b) and gs_obj.entered.get(color, False) and not getattr(gs_obj, 'chess_lock', False):
 
-                legal = [(sr,sc,er,ec) for (sr,sc,er,ec) in legal if in_chess_area(er,ec)]
+                legal = [m for m in legal if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]]]
 
             # Legacy migration no-exit rule removed in v2
 
@@ -3192,7 +3310,7 @@ def choose_ai_move_fast(board: Board, color: PColor, two_stage: bool, must_enter
 
         if getattr(gs_obj, 'chess_lock', False):
 
-            legal = [(sr,sc,er,ec) for (sr,sc,er,ec) in legal if in_chess_area(er,ec)]
+            legal = [m for m in legal if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]]]
 
     if two_stage and grace_block_fn:
 
@@ -3414,9 +3532,9 @@ def choose_ai_move_fast(board: Board, color: PColor, two_stage: bool, must_enter
 
             # reward forward displacement towards chess area
 
-            start_dist = dist_to_chess(sr, sc)
+            start_dist = _DIST_LUT[sr * BOARD_SIZE + sc]
 
-            end_dist = dist_to_chess(er, ec)
+            end_dist = _DIST_LUT[er * BOARD_SIZE + ec]
 
             dp = start_dist - end_dist
 
@@ -3498,188 +3616,241 @@ def choose_ai_move_fast(board: Board, color: PColor, two_stage: bool, must_enter
 
 
 
-def choose_ai_move_smart(board: Board, color: PColor, two_stage: bool, must_enter_filter=None, grace_block_fn=None, opponent: Optional[PColor]=None, time_ms: int = 1200):
-
-    best_move = None
+# Smart-AI transposition table, kept from one move to the next:
+# (zhash, side to move, searching colour, two_stage, chess_lock, rule context) -> (depth, score, flag, best_move)
+# Holds plain search values only; root scores carry root-only bonuses and live in _AI_ROOT_HINT as moves.
+_AI_TT = {}
+_AI_TT_MAX = 200000
+_AI_ROOT_HINT = {}   # root key -> best move of the last completed iteration (ordering hint only)
+_TT_EXACT, _TT_LOWER, _TT_UPPER = 0, 1, 2
+SMART_AI_MAX_DEPTH = 3
+_SMART_ROOT_BONUS_MAX = 12   # largest root-only bonus added on top of a searched value
+# History heuristic: (sr, sc, er, ec) -> sum of depth*depth over the quiet moves that caused a
+# cutoff; orders quiet moves inside the tree. Reset at the start of every smart-AI search.
+_AI_HISTORY = {}
 
-    best_val = -10**9
 
-    start = pygame.time.get_ticks()
 
-    deadline = start + max(200, time_ms)
+def _reset_ai_tables():
+    """Forget search results from the previous game (called when a new game starts)."""
+    _AI_TT.clear()
+    _AI_ROOT_HINT.clear()
+    _DUEL_TT.clear()
 
-    me = color
 
 
+def _eyes_rival_king(p, er, ec, king_positions) -> bool:
+    """Cheap check guess for move ordering: would `p` on (er, ec) line up with a rival king (blockers ignored)?"""
+    kind = p.kind
+    for col, kp in king_positions.items():
+        if kp is None or col == p.color:
+            continue
+        dr, dc = abs(kp[0] - er), abs(kp[1] - ec)
+        if kind == 'N':
+            hit = (dr == 1 and dc == 2) or (dr == 2 and dc == 1)
+        elif kind == 'R':
+            hit = dr == 0 or dc == 0
+        elif kind == 'B':
+            hit = dr == dc
+        elif kind == 'Q':
+            hit = dr == 0 or dc == 0 or dr == dc
+        elif kind == 'P':
+            hit = dr == 1 and dc == 1
+        else:
+            hit = False
+        if hit:
+            return True
+    return False
 
-    def time_up(): return pygame.time.get_ticks() >= deadline
 
 
+def _ai_order_moves(board: Board, moves, tt_move=None, target_left: Optional[PColor]=None):
+    """Sort moves in place: TT/previous best first, then captures by MVV-LVA, then likely checks,
+    then the remaining quiet moves by history."""
+    grid = board.grid
+    history = _AI_HISTORY
+    kings = board.king_positions
+    def key(m):
+        if m == tt_move:
+            return (3, 0, 0)
+        sr, sc, er, ec = m
+        victim = grid[er][ec]
+        attacker = grid[sr][sc]
+        if victim is None:
+            # quiet moves lining up on a rival king go first (geometric guess; a real check probe would
+            # need a make/unmake per move)
+            checks = attacker is not None and _eyes_rival_king(attacker, er, ec, kings)
+            return (1 if checks else 0, history.get(m, 0), 0)
+        mvv_lva = PIECE_VALUES.get(victim.kind, 0) * 10 - (PIECE_VALUES.get(attacker.kind, 0) if attacker else 0)
+        # captures on the left neighbour break ties (3-player target pressure)
+        return (2, mvv_lva, 1 if target_left is not None and victim.color == target_left else 0)
+    moves.sort(key=key, reverse=True)
 
-    def search(side: PColor, depth: int, alpha: int, beta: int) -> int:
 
-        if time_up(): return eval_board(board, me, two_stage=two_stage)
 
-        if depth <= 0: return eval_board(board, me, two_stage=two_stage)
+def choose_ai_move_smart(board: Board, color: PColor, two_stage: bool, must_enter_filter=None, grace_block_fn=None, opponent: Optional[PColor]=None, time_ms: int = 1200):
+    """Iterative-deepening paranoid alpha-beta: `color` maximises eval_board, every rival minimises.
 
+    Uses _AI_TT for cutoffs and move ordering; falls back to choose_ai_move_fast when no
+    depth produced a move inside the time budget.
+    """
+    deadline = time.perf_counter() + max(200, time_ms) / 1000.0
+    me = color
+    gs_obj = globals().get('gs')
+    chess_lock = bool(gs_obj and getattr(gs_obj, 'chess_lock', False))
+    # Everything besides the placement that side_moves() filters on; fixed for the whole search
+    rule_ctx = None
+    if gs_obj is not None:
+        try:
+            entered = gs_obj.entered
+            rule_ctx = (gs_obj.final_a, gs_obj.final_b, tuple(bool(entered.get(c, False)) for c in TURN_ORDER),
+                        bool(getattr(gs_obj, 'grace_active', False)))
+        except Exception:
+            rule_ctx = None
+    rule_ctx = (rule_ctx, must_enter_filter is not None, grace_block_fn is not None, opponent)
+    nodes = [0]
+    def time_up():
+        return time.perf_counter() >= deadline
+    def side_moves(side: PColor):
         moves = all_legal_moves_for_color(board, side)
-
         if two_stage and must_enter_filter:
-
             moves = must_enter_filter(moves)
-
-        gs_obj = globals().get('gs')
-
         if gs_obj:
-
             # Pre-lock stay-inside for this side if they've entered
-
             try:
-
-                if two_stage and side in (gs_obj.final_a, gs_obj.final_b) and gs_obj.entered.get(side, False) and not getattr(gs_obj, 'chess_lock', False):
-
-                    moves = [(sr,sc,er,ec) for (sr,sc,er,ec) in moves if in_chess_area(er,ec)]
-
+                if two_stage and side in (gs_obj.final_a, gs_obj.final_b) and gs_obj.entered.get(side, False) and not chess_lock:
+                    moves = [m for m in moves if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]]]
                 # Pre-lock no-exit per piece
-
-                if two_stage and side in (gs_obj.final_a, gs_obj.final_b) and not getattr(gs_obj, 'chess_lock', False):
-
-                    kept = []
-
-                    for (sr,sc,er,ec) in moves:
-
-                        if in_chess_area(sr,sc) and not in_chess_area(er,ec):
-
-                            continue
-
-                        kept.append((sr,sc,er,ec))
-
-                    moves = kept
-
+                if two_stage and side in (gs_obj.final_a, gs_obj.final_b) and not chess_lock:
+                    moves = [m for m in moves if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]] or not _IN_CHESS_LUT[m[0] * BOARD_SIZE + m[1]]]
             except Exception:
-
                 pass
-
-            if getattr(gs_obj, 'chess_lock', False):
-
-                moves = [(sr,sc,er,ec) for (sr,sc,er,ec) in moves if in_chess_area(er,ec)]
-
-        if two_stage and grace_block_fn:
-
-            non_check = [m for m in moves if not grace_block_fn(m, opponent if side==me else me)]
-
-            moves = non_check if non_check else moves
-
-        if not moves: return eval_board(board, me, two_stage=two_stage)
-
-        def mkey(m):
-
-            return moves
-
-        gs_obj = globals().get('gs')
-
-        if gs_obj and getattr(gs_obj, 'chess_lock', False):
-
-            moves = [(sr,sc,er,ec) for (sr,sc,er,ec) in moves if in_chess_area(er,ec)]
-
+            if chess_lock:
+                moves = [m for m in moves if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]]]
         if two_stage and grace_block_fn:
-
-            non_check = [m for m in moves if not grace_block_fn(m, opponent)]
-
+            non_check = [m for m in moves if not grace_block_fn(m, opponent if side == me else me)]
             moves = non_check if non_check else moves
-
-        if not moves: return None
-
-        # Determine left-neighbor target only in non two-stage play
-
-        target_left = None
-
-        if not two_stage:
-
+        return moves
+    def search(side: PColor, depth: int, alpha: int, beta: int) -> int:
+        if depth <= 0 or time_up():
+            return eval_board(board, me, two_stage=two_stage)
+        # keep the window responsive during long searches
+        nodes[0] += 1
+        if nodes[0] % 64 == 0:
             try:
-
-                target_left = _alive_next_color(board, me)
-
+                pygame.event.pump()
             except Exception:
-
-                target_left = None
-
-
-
-        def mkey(m):
-
-            sr,sc,er,ec = m
-
-            tgtp = board.get(er, ec)
-
-            capv = PIECE_VALUES.get(tgtp.kind, 0) if tgtp and tgtp.color != me else 0
-
-            # Target-aware capture priority boost in 3-player stage
-
-            if (not two_stage) and target_left is not None and tgtp and tgtp.color == target_left:
-
-                capv += 4
-
-            app, pen = _approach_terms(board, sr, sc, er, ec) if two_stage else (0,0)
-
-            cent = 2 if in_chess_area(er,ec) and two_stage else (1 if in_chess_area(er,ec) else 0)
-
-            # Rough proximity to center stays as weak tie-breaker
-
-            return (capv, cent, app, -dist_to_chess(er,ec), -abs( (er-6)**2 + (ec-6)**2 ))
-
-        moves.sort(key=mkey, reverse=True)
-
-        nxt = _alive_next_color(board, me)
-
-        cand_move = None; cand_val = -10**9
-
-        for (sr,sc,er,ec) in moves:
-
-            if time_up(): break
-
+                pass
+        key = (board.zhash, side, me, two_stage, chess_lock, rule_ctx)
+        entry = _AI_TT.get(key)
+        tt_move = None
+        if entry is not None:
+            e_depth, e_score, e_flag, tt_move = entry
+            if e_depth >= depth:
+                if e_flag == _TT_EXACT:
+                    return e_score
+                if e_flag == _TT_LOWER and e_score >= beta:
+                    return e_score
+                if e_flag == _TT_UPPER and e_score <= alpha:
+                    return e_score
+        moves = side_moves(side)
+        if not moves:
+            return eval_board(board, me, two_stage=two_stage)
+        _ai_order_moves(board, moves, tt_move)
+        nxt = _alive_next_color(board, side)
+        maximise = (side == me)
+        alpha0, beta0 = alpha, beta
+        best, best_m = (-10**9 if maximise else 10**9), None
+        for m in moves:
+            sr, sc, er, ec = m
+            cap, ph, pk, eff = board_do_move(board, sr, sc, er, ec, simulate=True)
+            val = search(nxt, depth - 1, alpha, beta)
+            board_undo_move(board, sr, sc, er, ec, cap, ph, pk, eff)
+            if maximise:
+                if val > best:
+                    best, best_m = val, m
+                alpha = max(alpha, best)
+            else:
+                if val < best:
+                    best, best_m = val, m
+                beta = min(beta, best)
+            if alpha >= beta:
+                if board.grid[m[2]][m[3]] is None:
+                    _AI_HISTORY[m] = _AI_HISTORY.get(m, 0) + depth * depth
+                break
+            if time_up():
+                return best  # partial result: do not store
+        if time_up():
+            # a child (possibly the one that caused the cutoff above) ran out of time and returned a
+            # static eval, so best is not a full-depth bound: do not store it
+            return best
+        flag = _TT_UPPER if best <= alpha0 else (_TT_LOWER if best >= beta0 else _TT_EXACT)
+        old = _AI_TT.get(key)
+        if old is None or old[0] <= depth:  # prefer deeper entries
+            if len(_AI_TT) >= _AI_TT_MAX:
+                _AI_TT.clear()
+            _AI_TT[key] = (depth, best, flag, best_m)
+        return best
+    root_moves = side_moves(me)
+    if not root_moves:
+        return None
+    # Determine left-neighbor target only in non two-stage play
+    target_left = None
+    if not two_stage:
+        try:
+            target_left = _alive_next_color(board, me)
+        except Exception:
+            target_left = None
+    nxt = _alive_next_color(board, me)
+    root_key = (board.zhash, me, me, two_stage, chess_lock, rule_ctx)
+    best_move = None
+    _AI_HISTORY.clear()
+    for depth in range(1, SMART_AI_MAX_DEPTH + 1):
+        _ai_order_moves(board, root_moves, best_move or _AI_ROOT_HINT.get(root_key), target_left)
+        cand_move, cand_val = None, -10**9
+        complete = True
+        for (sr,sc,er,ec) in root_moves:
+            if time_up():
+                complete = False
+                break
             cap, ph, pk, eff = board_do_move(board, sr,sc,er,ec, simulate=True)
-
-            val = search(nxt, depth-1, -10**9, 10**9)
-
+            # widen alpha by the largest root bonus so a fail-low bound plus bonus stays sound
+            val = search(nxt, depth - 1, cand_val - _SMART_ROOT_BONUS_MAX, 10**9)
             # 3-player target-aware bonus: checking left-neighbor is valuable; checking the third wheel is less so
-
             if (not two_stage) and target_left is not None:
-
                 try:
-
                     if king_in_check(board, target_left):
-
                         val += 12
-
                     # discourage checking the non-target rival a bit to reduce wasted tempo
-
                     others = [c for c in TURN_ORDER if c not in (me, target_left) and board.find_king(c) is not None]
-
                     for oc in others:
-
                         if king_in_check(board, oc):
-
                             val -= 3
-
                             break
-
                 except Exception:
-
                     pass
-
+            # Deprioritize moves that create a threefold repetition (if avoidable)
+            if gs_obj is not None:
+                try:
+                    if gs_obj.pos_counts.get(gs_obj._position_key(board), 0) + 1 >= 3:
+                        val -= 100
+                except Exception:
+                    pass
             board_undo_move(board, sr,sc,er,ec, cap, ph, pk, eff)
-
-            if val > cand_val: cand_val, cand_move = val, (sr,sc,er,ec)
-
-        if cand_move is not None: best_move, best_val = cand_move, cand_val
-
-    # if time_up(): break  # Removed: not inside a loop
-
+            if val > cand_val:
+                cand_val, cand_move = val, (sr,sc,er,ec)
+        if complete and time_up():
+            complete = False  # the last root move's subtree was cut short
+        if cand_move is not None and (complete or best_move is None):
+            best_move = cand_move
+            if complete:
+                if len(_AI_ROOT_HINT) >= _AI_TT_MAX:
+                    _AI_ROOT_HINT.clear()
+                _AI_ROOT_HINT[root_key] = cand_move
+        if not complete:
+            break
     if best_move is None:
-
         return choose_ai_move_fast(board, me, two_stage, must_enter_filter, grace_block_fn, opponent)
-
     return best_move
 
 
@@ -3886,6 +4057,14 @@ def _clear_caches_on_scale_change():
 
         _image_cache.clear()
 
+        _board_bg_cache.clear()
+
+        _move_ring_cache.clear()
+
+        _outline_cache.clear()
+
+        _pulse_surface_cache.clear()
+
     except Exception:
 
         pass
@@ -4274,17 +4453,15 @@ def export_rules_and_open_async():
 
     def _task():
 
-        out_dir = os.path.join(SCRIPT_DIR, 'docs')
-
+        out_dir = DOCS_DIR
         try:
-
             os.makedirs(out_dir, exist_ok=True)
 
         except Exception:
 
             pass
 
-        tool = os.path.join(SCRIPT_DIR, 'tools', 'export_rules.py')
+        tool = os.path.join(TOOLS_DIR, 'export_rules.py')
 
         if not os.path.exists(tool):
 
@@ -4316,8 +4493,7 @@ def export_rules_and_open_async():
 
         pdf_path = os.path.join(out_dir, 'rules.pdf')
 
-        txt_path = os.path.join(out_dir, 'rules.txt')
-
+        txt_path = RULES_TXT_PATH
         target = pdf_path if os.path.exists(pdf_path) else txt_path if os.path.exists(txt_path) else out_dir
 
         _open_with_default_app(target)
@@ -4373,18 +4549,52 @@ UI_STATE: Dict[str, object] = {}
 
 
 
-def get_sidebar_font(size=18, bold=False):
+def get_sidebar_font(size=18, bold=False, name="Arial"):
+
+    # SysFont does a system font lookup, so each (size, bold, name) is opened once
 
-    key = (size, bold)
+    key = (size, bold, name)
 
     if key not in _sidebar_font_cache:
 
-        _sidebar_font_cache[key] = pygame.font.SysFont("Arial", size, bold=bold)
+        _sidebar_font_cache[key] = pygame.font.SysFont(name, size, bold=bold)
 
     return _sidebar_font_cache[key]
 
 
 
+# Rendered UI text (move-list lines, labels, banners); keep the most recent 512
+_text_cache = {}
+_TEXT_CACHE_MAX = 512
+
+
+
+def render_text(font, text, color):
+    """Antialiased font.render() through an LRU cache keyed by (font, text, color).
+
+    Move-list lines, labels and banners repeat from frame to frame, so the glyph
+    rasterisation runs once per distinct string. Callers must not draw on the result.
+    """
+    key = (font, text, color)
+    surf = _text_cache.pop(key, None)
+    if surf is None:
+        surf = font.render(text, True, color)
+        if len(_text_cache) >= _TEXT_CACHE_MAX:
+            _text_cache.pop(next(iter(_text_cache)))
+    _text_cache[key] = surf  # (re)insert as most recently used
+    return surf
+
+
+def _blit_batch(screen, seq) -> None:
+    """Blit (surface, pos) pairs in one call: pygame-ce's fblits() when present, else blits() without the rect list."""
+    fblits = getattr(screen, 'fblits', None)
+    if fblits is not None:
+        fblits(seq)
+    else:
+        screen.blits(seq, False)
+
+
+
 def draw_button(screen, rect: pygame.Rect, label: str, active: bool=True, font_size: int=18, key: Optional[str]=None):
 
     k = key if key is not None else label
@@ -4427,7 +4637,7 @@ def draw_button(screen, rect: pygame.Rect, label: str, active: bool=True, font_s
 
     font = get_sidebar_font(font_size, True)
 
-    surf = font.render(label, True, fg)
+    surf = render_text(font, label, fg)
 
     text_rect = surf.get_rect(center=r.center)
 
@@ -4459,7 +4669,7 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
     title_font = get_sidebar_font(22, True)
 
-    header = title_font.render("Move List", True, (220,220,220))
+    header = render_text(title_font, "Move List", (220,220,220))
 
     screen.blit(header, (x0 + 12, 10))
 
@@ -4768,6 +4978,8 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
             new_label = "Confirm New Game"
 
+            UI_STATE['animating'] = True
+
         else:
 
             new_label = "New Game"
@@ -4812,7 +5024,7 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
         msg += " - Checks deferred"
 
-    surf = get_sidebar_font(16, True).render(msg, True, (230,230,180))
+    surf = render_text(get_sidebar_font(16, True), msg, (230,230,180))
 
     screen.blit(surf, (x0 + 12, y))
 
@@ -4820,7 +5032,7 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
     if locked:
 
-        surf_lock = get_sidebar_font(15, True).render("Chess lock: ON", True, (180,220,255))
+        surf_lock = render_text(get_sidebar_font(15, True), "Chess lock: ON", (180,220,255))
 
         screen.blit(surf_lock, (x0 + 12, y))
 
@@ -4844,7 +5056,7 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
             fg = PLAYER_COLORS[col] if col != PColor.BLACK else (255,255,255)
 
-            tag = get_sidebar_font(16, False).render(f"{col.name[0]}:{val}", True, fg)
+            tag = render_text(get_sidebar_font(16, False), f"{col.name[0]}:{val}", fg)
 
             screen.blit(tag, (x0 + 14 + len(parts)*54, y))
 
@@ -4946,7 +5158,9 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
     view = moves_list[start_idx:end_idx]
 
-    # Also show algebraic notation for each move
+    # Lines come from the rendered-line cache and go out in one batched blit
+
+    side_blits = []
 
     for i, text in enumerate(view):
 
@@ -4954,51 +5168,9 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
         col = (235,235,235) if i % 2 == 0 else (200,200,200)
 
-        # Try to parse move_no, color, piece, sr, sc, er, ec, captured, promoted from text
-
-        # Fallback: just show the text
-
-        try:
-
-            # moves_list is built using format_move_entry, so we can reconstruct the info
-
-            # Example: '12. WHITE: Q d1h5 x=Q'
-
-            import re
-
-            m = re.match(r"(\d+)\. (\w+): (\w) (\w+)[-](\w+)( x)?( =Q)?", text)
-
-            if m:
-
-                move_no = int(m.group(1))
-
-                color = m.group(2)
-
-                piece = m.group(3)
-
-                # We don't have sr,sc,er,ec directly, so skip if not available
-
-                # Just show the original text
-
-                surf = get_sidebar_font(16).render(text, True, col)
-
-                screen.blit(surf, (x0 + 12, ty))
-
-            else:
-
-                surf = get_sidebar_font(16).render(text, True, col)
-
-                screen.blit(surf, (x0 + 12, ty))
+        side_blits.append((render_text(get_sidebar_font(16), text, col), (x0 + 12, ty)))
 
-        except Exception:
-
-            surf = get_sidebar_font(16).render(text, True, col)
-
-            screen.blit(surf, (x0 + 12, ty))
-
-        # Now, if we have the move data, show algebraic notation below
-
-        # Instead, let's store algebraic moves in parallel and show them
+        # Algebraic notation below the entry when a parallel list is attached to the screen
 
         if hasattr(screen, '_algebraic_moves'):
 
@@ -5006,9 +5178,11 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
                 alg = screen._algebraic_moves[start_idx + i]
 
-                surf2 = get_sidebar_font(14).render(alg, True, (180,180,255))
+                side_blits.append((render_text(get_sidebar_font(14), alg, (180,180,255)), (x0 + 32, ty+14)))
+
+    if side_blits:
 
-                screen.blit(surf2, (x0 + 32, ty+14))
+        _blit_batch(screen, side_blits)
 
 
 
@@ -5016,9 +5190,9 @@ def draw_sidebar(screen, moves_list, scroll_offset, show_material, captured_poin
 
 def draw_resign_pill(screen, center_x, center_y, label, bg_rgba, fg_rgb):
 
-    pill_font = pygame.font.SysFont("Arial", 18, bold=True)
+    pill_font = get_sidebar_font(18, True)
 
-    text_surf = pill_font.render(label, True, fg_rgb)
+    text_surf = render_text(pill_font, label, fg_rgb)
 
     w = text_surf.get_width() + 14
 
@@ -5050,9 +5224,7 @@ def show_toast(msg: str, ms: int = 1500):
 
         UI_STATE['toast_text'] = str(msg)
 
-        import pygame as _pg
-
-        UI_STATE['toast_until'] = _pg.time.get_ticks() + int(ms)
+        UI_STATE['toast_until'] = pygame.time.get_ticks() + int(ms)
 
     except Exception:
 
@@ -5062,29 +5234,147 @@ def show_toast(msg: str, ms: int = 1500):
 
 
 
-def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_text=None,
+_board_bg_cache = {}
+_move_ring_cache = {}
+_click_ring_cache = {}   # (radius, alpha) -> ripple ring sprite
+_pulse_surface_cache = {}   # SQUARE -> reusable destination-pulse surface
+_inset_rects_cache = {}   # SQUARE -> [r][c] outline rects inset 2px into each square
+_outline_cache = {}   # (SQUARE, color, width) -> inset square outline sprite
+_banner_rect_cache = {}   # SQUARE -> status bar Rect under the board
 
-               resign_hover: Optional[PColor]=None, ui_state_text: Optional[str]=None,
 
-               flash_color: Optional[PColor]=None, flash_on: bool = True):
 
-    # squares
+def _square_inset_rects():
+    """Per-square (x, y, w, h) outline rects inset 2px, built once per SQUARE (resizes change it)."""
+    rects = _inset_rects_cache.get(SQUARE)
+    if rects is None:
+        rects = [[(c * SQUARE + 2, r * SQUARE + 2, SQUARE - 4, SQUARE - 4) for c in range(BOARD_SIZE)]
+                 for r in range(BOARD_SIZE)]
+        _inset_rects_cache.clear()
+        _inset_rects_cache[SQUARE] = rects
+    return rects
 
-    for r in range(BOARD_SIZE):
 
-        for c in range(BOARD_SIZE):
 
-            rr, cc = _transform_rc_for_view(r, c)
+def _banner_rect():
+    """Status/banner bar below the board, shared by every banner path; treat as read-only."""
+    bar = _banner_rect_cache.get(SQUARE)
+    if bar is None:
+        bar = pygame.Rect(0, BOARD_SIZE*SQUARE, LOGICAL_W, 44)
+        _banner_rect_cache.clear()
+        _banner_rect_cache[SQUARE] = bar
+    return bar
+
+
 
+def _board_background():
+    """Squares, 8-8 frame and corner blocks for the current view, rendered once per (SQUARE, seat)."""
+    key = (SQUARE, _seat_for_view(), tuple(PLAYER_COLORS[p] for p in CORNER_RECTS))
+    bg = _board_bg_cache.get(key)
+    if bg is not None:
+        return bg
+    bg = pygame.Surface((BOARD_SIZE * SQUARE, BOARD_SIZE * SQUARE))
+    # squares
+    for r in range(BOARD_SIZE):
+        for c in range(BOARD_SIZE):
+            rr, cc = _transform_rc_for_view(r, c)
             color = LIGHT if (r+c)%2==0 else DARK
+            pygame.draw.rect(bg, color, (cc*SQUARE, rr*SQUARE, SQUARE, SQUARE))
+    # chess 8x8 frame
+    pygame.draw.rect(bg, (40,120,40), (CH_MIN*SQUARE, CH_MIN*SQUARE, 8*SQUARE, 8*SQUARE), 5)
+    # corner fills (per-cell draw to stay correct under rotation)
+    for pcol, (r0, c0) in CORNER_RECTS.items():
+        fill_col = (*PLAYER_COLORS[pcol],)
+        transformed_cells = []
+        for dr in (0, 1):
+            for dc in (0, 1):
+                rr, cc = _transform_rc_for_view(r0 + dr, c0 + dc)
+                transformed_cells.append((rr, cc))
+                pygame.draw.rect(bg, fill_col, (cc * SQUARE, rr * SQUARE, SQUARE, SQUARE))
+        # outline around the 2x2 block
+        try:
+            min_r = min(rr for rr, _ in transformed_cells)
+            min_c = min(cc for _, cc in transformed_cells)
+            pygame.draw.rect(bg, (40, 40, 40), (min_c * SQUARE, min_r * SQUARE, 2 * SQUARE, 2 * SQUARE), 2)
+        except Exception:
+            pass
+    try:
+        bg = bg.convert()
+    except Exception:
+        pass
+    _board_bg_cache[key] = bg
+    return bg
 
-            pygame.draw.rect(screen, color, (cc*SQUARE, rr*SQUARE, SQUARE, SQUARE))
 
+def _square_outline(color, width: int):
+    """Square outline (inset 2px, as in _square_inset_rects) as a reusable sprite, so outline passes can batch-blit."""
+    key = (SQUARE, color, width)
+    ring = _outline_cache.get(key)
+    if ring is None:
+        ring = pygame.Surface((SQUARE-4, SQUARE-4), pygame.SRCALPHA)
+        pygame.draw.rect(ring, color, (0, 0, SQUARE-4, SQUARE-4), width)
+        _outline_cache[key] = ring
+    return ring
 
 
-    # chess 8x8 frame
+def _move_ring():
+    """Candidate-move outline (drawn inset 8px in each square) as a reusable sprite."""
+    ring = _move_ring_cache.get(SQUARE)
+    if ring is None:
+        ring = pygame.Surface((SQUARE-16, SQUARE-16), pygame.SRCALPHA)
+        pygame.draw.rect(ring, (100,200,100), (0, 0, SQUARE-16, SQUARE-16), 2)
+        _move_ring_cache[SQUARE] = ring
+    return ring
+
+
+class ClickIndicator:
+    """Transient click ripple centred on (cx, cy), visible until `until` (ms ticks)."""
+    __slots__ = ('cx', 'cy', 'until')
+
+    def __init__(self, cx: int, cy: int, until: int):
+        self.cx = cx
+        self.cy = cy
+        self.until = until
+
+
+class MovePulse:
+    """Destination-square glow after a move, visible until `until` (ms ticks)."""
+    __slots__ = ('r', 'c', 'until')
+
+    def __init__(self, r: int, c: int, until: int):
+        self.r = r
+        self.c = c
+        self.until = until
+
+
+def _click_ring(rad: int, alpha: int):
+    """Click ripple ring; rad and alpha both derive from the fade fraction, so the set stays small."""
+    key = (rad, alpha)
+    ring = _click_ring_cache.get(key)
+    if ring is None:
+        ring = pygame.Surface((rad*2+2, rad*2+2), pygame.SRCALPHA)
+        pygame.draw.circle(ring, (255,255,255, alpha), (rad+1, rad+1), rad, 2)
+        _click_ring_cache[key] = ring
+    return ring
+
 
-    pygame.draw.rect(screen, (40,120,40), (CH_MIN*SQUARE, CH_MIN*SQUARE, 8*SQUARE, 8*SQUARE), 5)
+def _pulse_surface():
+    """Reusable SQUARE x SQUARE alpha surface for the move pulse (cleared by the caller)."""
+    glow = _pulse_surface_cache.get(SQUARE)
+    if glow is None:
+        _pulse_surface_cache.clear()
+        glow = pygame.Surface((SQUARE, SQUARE), pygame.SRCALPHA)
+        _pulse_surface_cache[SQUARE] = glow
+    return glow
+
+
+
+def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_text=None,
+               resign_hover: Optional[PColor]=None, ui_state_text: Optional[str]=None,
+               flash_color: Optional[PColor]=None, flash_on: bool = True):
+    # squares, 8-8 frame and corner blocks come pre-rendered (the corners sit outside
+    # the frame, so drawing them before the entry pulse below changes nothing)
+    screen.blit(_board_background(), (0, 0))
 
 
 
@@ -5116,6 +5406,8 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
             if needs_entry:
 
+                UI_STATE['animating'] = True
+
                 t = pygame.time.get_ticks() * 0.006  # pulse speed
 
                 amp = (math.sin(t) + 1.0) * 0.5      # 0..1
@@ -5136,40 +5428,6 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
 
 
-    # corner fills (per-cell draw to stay correct under rotation)
-
-    for pcol, (r0, c0) in CORNER_RECTS.items():
-
-        fill_col = (*PLAYER_COLORS[pcol],)
-
-        transformed_cells = []
-
-        for dr in (0, 1):
-
-            for dc in (0, 1):
-
-                rr, cc = _transform_rc_for_view(r0 + dr, c0 + dc)
-
-                transformed_cells.append((rr, cc))
-
-                pygame.draw.rect(screen, fill_col, (cc * SQUARE, rr * SQUARE, SQUARE, SQUARE))
-
-        # outline around the 2x2 block
-
-        try:
-
-            min_r = min(rr for rr, _ in transformed_cells)
-
-            min_c = min(cc for _, cc in transformed_cells)
-
-            pygame.draw.rect(screen, (40, 40, 40), (min_c * SQUARE, min_r * SQUARE, 2 * SQUARE, 2 * SQUARE), 2)
-
-        except Exception:
-
-            pass
-
-
-
     # selection + legal moves
 
     if selected:
@@ -5178,6 +5436,10 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
         pygame.draw.rect(screen, HL, (sc*SQUARE, sr*SQUARE, SQUARE, SQUARE), 3)
 
+    ring = _move_ring()
+
+    ring_blits = []
+
     for m in moves:
 
         try:
@@ -5202,7 +5464,11 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
             continue
 
-        pygame.draw.rect(screen, (100,200,100), (mc*SQUARE+8, mr*SQUARE+8, SQUARE-16, SQUARE-16), 2)
+        ring_blits.append((ring, (mc*SQUARE+8, mr*SQUARE+8)))
+
+    if ring_blits:
+
+        _blit_batch(screen, ring_blits)
 
 
 
@@ -5246,19 +5512,21 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
 
 
-    # pieces (respect flashing elimination)
+    # pieces (respect flashing elimination); walk the per-colour bitboards and send the
 
-    for r in range(BOARD_SIZE):
+    # cached sprites to the screen in a single batched blit
 
-        for c in range(BOARD_SIZE):
+    piece_blits = []
 
-            p = board.get(r,c)
+    for pcol, bits in board.bb.items():
 
-            if not p: continue
+        if flash_color is not None and pcol == flash_color and not flash_on:
+
+            continue  # hidden this frame for flashing
 
-            if flash_color is not None and p.color == flash_color and not flash_on:
+        for r, c in bb_squares(bits):
 
-                continue  # hidden this frame for flashing
+            p = board.grid[r][c]
 
             rr, cc = _transform_rc_for_view(r, c)
 
@@ -5270,7 +5538,7 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
             if img is not None:
 
-                screen.blit(img, img.get_rect(center=(cx, cy)))
+                piece_blits.append((img, img.get_rect(center=(cx, cy))))
 
             else:
 
@@ -5282,11 +5550,12 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
                 pygame.draw.rect(screen, outline_color, rect, 2, border_radius=6)
 
                 label_color = (20, 20, 20) if p.color == PColor.WHITE else (235, 235, 235)
-                glyph = font.render(p.kind, True, label_color)
+                glyph = render_text(font, p.kind, label_color)
                 screen.blit(glyph, glyph.get_rect(center=(cx, cy)))
 
+    if piece_blits:
 
-
+        _blit_batch(screen, piece_blits)
     # Highlight kings that are currently in check (blinking red overlay)
 
     try:
@@ -5311,6 +5580,8 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
         if check_positions:
 
+            UI_STATE['animating'] = True
+
             blink_on = (pygame.time.get_ticks() // 240) % 2 == 0
 
             if blink_on:
@@ -5375,7 +5646,7 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
                     txt = 'K' if in_chess_area(kr, kc) else 'K-'
 
-                    lab = labf.render(txt, True, (20,20,20))
+                    lab = render_text(labf, txt, (20,20,20))
 
                     screen.blit(lab, (cc * SQUARE + 4, rr * SQUARE + 2))
 
@@ -5555,15 +5826,15 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
     # status bar
 
-    bar = pygame.Rect(0, BOARD_SIZE*SQUARE, LOGICAL_W, 44)
+    bar = _banner_rect()
 
     pygame.draw.rect(screen, BANNER_OK, bar)
 
-    status_font = pygame.font.SysFont("Arial", 20, bold=True)
+    status_font = get_sidebar_font(20, True)
 
     left_text = f"Turn: {turn_color.name}"
 
-    if banner_text:   left_text += f" | {banner_text}"
+    if banner_text:   left_text += f" | {banner_to_text(banner_text)}"
 
     if ui_state_text: left_text += f" | {ui_state_text}"
 
@@ -5603,7 +5874,7 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
     txt_color = PLAYER_COLORS[turn_color] if turn_color != PColor.BLACK else (255,255,255)
 
-    txt = status_font.render(left_text, True, txt_color)
+    txt = render_text(status_font, left_text, txt_color)
 
     screen.blit(txt, (10, BOARD_SIZE*SQUARE + 8))
 
@@ -5617,17 +5888,17 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
         tuntil = int(UI_STATE.get('toast_until', 0) or 0)
 
-        import pygame as _pg
-
-        now = _pg.time.get_ticks()
+        now = pygame.time.get_ticks()
 
         if tmsg and (tuntil == 0 or now < tuntil):
 
+            UI_STATE['animating'] = True
+
             pad = 10
 
             tf = get_sidebar_font(18, True)
 
-            ts = tf.render(str(tmsg), True, (255,255,255))
+            ts = render_text(tf, str(tmsg), (255,255,255))
 
             tw, th = ts.get_width(), ts.get_height()
 
@@ -5635,7 +5906,7 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
             cy = 18 + th // 2
 
-            bg = _pg.Surface((tw + pad*2, th + pad*2), _pg.SRCALPHA)
+            bg = pygame.Surface((tw + pad*2, th + pad*2), pygame.SRCALPHA)
 
             bg.fill((0,0,0,170))
 
@@ -5708,7 +5979,7 @@ def draw_board(screen, board: Board, selected, moves, font, turn_color, banner_t
 
         if globals().get('AI_DEBUG_HUD', False):
 
-            hud_font = pygame.font.SysFont("Consolas", 18)
+            hud_font = get_sidebar_font(18, False, "Consolas")
 
             lines = ["AI HUD"]
 
@@ -5791,9 +6062,6 @@ def draw_library_overlay(screen) -> None:
 
     overlay = UI_STATE.get('library_overlay')
 
-    import pygame as _pg
-
-
     if not overlay:
 
         for key in list(UI_RECTS.keys()):
@@ -5841,12 +6109,12 @@ def draw_library_overlay(screen) -> None:
         height = max(240, screen_h - margin * 2)
     y = margin
 
-    panel_rect = _pg.Rect(x, y, width, height)
+    panel_rect = pygame.Rect(x, y, width, height)
 
     UI_STATE['library_overlay_rect'] = panel_rect
 
 
-    surface = _pg.Surface((width, height), _pg.SRCALPHA)
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
 
     surface.fill((12, 12, 12, 238))
 
@@ -5872,13 +6140,13 @@ def draw_library_overlay(screen) -> None:
     surface.blit(small_font.render(folder, True, (180, 180, 180)), (20, 40))
 
 
-    close_rect = _pg.Rect(width - 36, 16, 20, 20)
+    close_rect = pygame.Rect(width - 36, 16, 20, 20)
 
-    _pg.draw.rect(surface, (200, 80, 80), close_rect, border_radius=4)
+    pygame.draw.rect(surface, (200, 80, 80), close_rect, border_radius=4)
 
     surface.blit(body_font.render("X", True, (20, 20, 20)), close_rect.move(4, -2))
 
-    UI_RECTS['library_overlay_close'] = _pg.Rect(panel_rect.x + close_rect.x,
+    UI_RECTS['library_overlay_close'] = pygame.Rect(panel_rect.x + close_rect.x,
 
                                                  panel_rect.y + close_rect.y,
 
@@ -5910,7 +6178,7 @@ def draw_library_overlay(screen) -> None:
     UI_STATE['library_overlay_max_scroll'] = max_scroll
 
 
-    mouse_pos = _pg.mouse.get_pos()
+    mouse_pos = pygame.mouse.get_pos()
 
 
     columns = [
@@ -5930,7 +6198,7 @@ def draw_library_overlay(screen) -> None:
 
         surface.blit(small_font.render(label, True, (160, 200, 220)), (col_x, list_top))
 
-    _pg.draw.line(surface, (60, 60, 60), (16, list_top + 18), (width - 16, list_top + 18))
+    pygame.draw.line(surface, (60, 60, 60), (16, list_top + 18), (width - 16, list_top + 18))
 
 
     start_index = scroll
@@ -5944,13 +6212,13 @@ def draw_library_overlay(screen) -> None:
 
         abs_index = start_index + idx
 
-        row_rect = _pg.Rect(16, y_cursor - 4, width - 32, row_height)
+        row_rect = pygame.Rect(16, y_cursor - 4, width - 32, row_height)
 
-        global_rect = _pg.Rect(panel_rect.x + row_rect.x, panel_rect.y + row_rect.y, row_rect.width, row_rect.height)
+        global_rect = pygame.Rect(panel_rect.x + row_rect.x, panel_rect.y + row_rect.y, row_rect.width, row_rect.height)
 
         hovered = global_rect.collidepoint(mouse_pos)
 
-        _pg.draw.rect(surface, (40, 40, 60, 140) if hovered else (22, 22, 30, 120), row_rect, border_radius=4)
+        pygame.draw.rect(surface, (40, 40, 60, 140) if hovered else (22, 22, 30, 120), row_rect, border_radius=4)
 
 
         file_text = body_font.render(str(entry.get('file', '')), True, (240, 240, 240))
@@ -6125,6 +6393,26 @@ def format_move_algebraic(move_no: int, color: PColor, piece_letter: str, sr, sc
 
 
 
+# Status-bar banners raised by game events may be stored as (kind, *args) specs; the text is
+# only built when the status bar is drawn, and memoised since the same banner redraws every frame.
+_BANNER_TEMPLATES = {
+    'resigned': "{0.name} resigned.",
+    'queen_reduce': "{0.name}: reduced {1} Queen(s) to Bishop(s) on entry.",
+}
+_banner_text_cache = {}
+
+def banner_to_text(banner) -> str:
+    """Return the display text for a banner given as a plain string or a (kind, *args) spec."""
+    if not isinstance(banner, tuple):
+        return banner
+    text = _banner_text_cache.get(banner)
+    if text is None:
+        text = _BANNER_TEMPLATES[banner[0]].format(*banner[1:])
+        _banner_text_cache[banner] = text
+    return text
+
+
+
 # ====== GAME STATE ======
 
 class GameState:
@@ -6180,6 +6468,22 @@ class GameState:
 
         self.chess_lock = False
 
+        # Duel hand-off (finalist flash -> teleport -> duel); draw_board reads these every frame
+
+        self._finalists_prep_started = False
+
+        self._finalists_a: Optional[PColor] = None
+
+        self._finalists_b: Optional[PColor] = None
+
+        self._flash_until = None
+
+        self._duel_delay_until = None
+
+        self._duel_started = False
+
+        self._duel_banner: Optional[str] = None
+
         # Auto-elimination score threshold: 0=Off, 18 or 30 supported
 
         self.auto_elim_threshold = 18
@@ -6260,39 +6564,33 @@ class GameState:
 
     def _position_key(self, board: 'Board') -> int:
 
-        """Compute a simple stable hash for the current board position ignoring move clocks.
+        """Compute a stable hash for the current board position ignoring move clocks.
 
-        We use a deterministic hashlib.sha1 over piece placements and turn order.
+        Starts from the board's incrementally maintained Zobrist hash (placements plus
 
-        """
-
-        s = []
-
-        for r in range(BOARD_SIZE):
+        has_moved) so no board scan is needed per move.
 
-            for c in range(BOARD_SIZE):
+        """
 
-                p = board.get(r, c)
+        key = board.zhash
 
-                if p:
+        # include two-stage flags and pawn_dir to reflect rule-affecting state
 
-                    s.append(f"{r},{c},{p.kind},{p.color.value},{int(p.has_moved)};")
+        if self.two_stage_active:
 
-        # include two-stage flags and pawn_dir to reflect rule-affecting state
+            key ^= ZOBRIST_TWO_STAGE
 
-        s.append(f"two_stage:{int(self.two_stage_active)};")
+        for col in TURN_ORDER:
 
-        s.append(f"pawn_dir:{','.join(str(self.pawn_dir[col]) for col in TURN_ORDER)};")
+            key ^= ZOBRIST_PAWN_DIR[col].get(self.pawn_dir[col], 0)
 
         # turn counter parity influences repetition (whose move it is)
 
-        s.append(f"turnpar:{GameState.turn_counter % 2};")
+        if GameState.turn_counter % 2:
 
-        key = hashlib.sha1(''.join(s).encode('utf-8')).hexdigest()
+            key ^= ZOBRIST_TURN_PARITY
 
-        # return an integer for compact storage
-
-        return int(key[:16], 16)
+        return key
 
 
 
@@ -6352,8 +6650,48 @@ class GameState:
 
 
 
+class FramePacer:
+    """Drop-in for pygame.time.Clock.tick() with drift-free frame deadlines.
+
+    Deadlines advance by a fixed step on time.perf_counter(); most of the gap is slept
+    and only the last FRAME_SPIN_S is spun, so frames land on time without the coarse
+    granularity of Clock.tick()/time.wait(). After a stall the schedule restarts.
+    """
+
+    FRAME_SPIN_S = 0.0015
+
+    def __init__(self):
+        self.deadline = None
+        self.last = time.perf_counter()
+
+    def tick(self, framerate: int = 60) -> int:
+        step = 1.0 / framerate
+        now = time.perf_counter()
+        if self.deadline is None or now - self.deadline > step:
+            self.deadline = now
+        self.deadline += step
+        remain = self.deadline - now
+        if remain > self.FRAME_SPIN_S:
+            time.sleep(remain - self.FRAME_SPIN_S)
+        while time.perf_counter() < self.deadline:
+            time.sleep(0)
+        now = time.perf_counter()
+        elapsed, self.last = now - self.last, now
+        return int(elapsed * 1000)
+
+
+
 # ====== MAIN ======
 
+# Input event types the game never handles (blocked at startup in main)
+_UNUSED_EVENT_TYPES = (
+    'JOYAXISMOTION', 'JOYBALLMOTION', 'JOYHATMOTION', 'JOYBUTTONDOWN', 'JOYBUTTONUP',
+    'JOYDEVICEADDED', 'JOYDEVICEREMOVED',
+    'CONTROLLERAXISMOTION', 'CONTROLLERBUTTONDOWN', 'CONTROLLERBUTTONUP',
+    'CONTROLLERDEVICEADDED', 'CONTROLLERDEVICEREMOVED', 'CONTROLLERDEVICEREMAPPED',
+    'FINGERMOTION', 'FINGERDOWN', 'FINGERUP', 'MULTIGESTURE',
+)
+
 def main():
 
     # Initialize pygame modules before using display or fonts
@@ -6368,45 +6706,31 @@ def main():
 
         pass
 
-    # === Pure snapshot helpers (from archive) ===
+    # Keep joystick/controller/touch traffic out of the queue: the game never reads it,
 
-    def dump_board(b: Board):
+    # and a polling pad or touch screen can otherwise flood the single per-frame drain
 
-        items = []
+    try:
 
-        for rr in range(BOARD_SIZE):
+        pygame.event.set_blocked([getattr(pygame, name) for name in _UNUSED_EVENT_TYPES if hasattr(pygame, name)])
 
-            for cc in range(BOARD_SIZE):
+    except Exception:
 
-                p = b.get(rr, cc)
+        pass
 
-                if p:
+    # === Pure snapshot helpers (from archive) ===
 
-                    items.append((rr, cc, p.kind, p.color.value, p.has_moved))
+    def dump_board(b: Board):
 
-        return items
+        return b.dump_items()
 
 
 
     def load_board(items):
 
-        nb = Board()
-
-        for rr in range(BOARD_SIZE):
-
-            for cc in range(BOARD_SIZE):
-
-                nb.set(rr, cc, None)
-
-        for (rr, cc, kind, colv, moved) in items:
-            if is_blocked_square(rr, cc):
-                continue
-
-            q = Piece(kind, PColor(colv))
+        nb = Board.empty()
 
-            q.has_moved = bool(moved)
-
-            nb.set(rr, cc, q)
+        nb.restore_items(items)
 
         return nb
 
@@ -6560,21 +6884,7 @@ def main():
 
         # Restore all game state in place (do not reassign board)
 
-        for rr in range(BOARD_SIZE):
-
-            for cc in range(BOARD_SIZE):
-
-                board.set(rr, cc, None)
-
-        for (rr, cc, kind, colv, moved) in snap["board"]:
-            if is_blocked_square(rr, cc):
-                continue
-
-            q = Piece(kind, PColor(colv))
-
-            q.has_moved = bool(moved)
-
-            board.set(rr, cc, q)
+        board.restore_items(snap["board"])
 
         # Update turn and forced_turn
 
@@ -6848,7 +7158,7 @@ def main():
 
     running = True
 
-    clock = pygame.time.Clock()
+    clock = FramePacer()
 
     replay_mode = False  # Always start in normal mode
 
@@ -6951,7 +7261,7 @@ def main():
     def _prepare_forced_duel_reset():
         nonlocal turn_i, forced_turn, selected, moves, dragging, drag_start, drag_legal_targets
         nonlocal history, future, replay_mode, sidebar_scroll, game_over, auto_elim_enabled, mat, moves_list, show_material
-        turn_i = TURN_ORDER.index(PColor.WHITE)
+        turn_i = TURN_INDEX[PColor.WHITE]
         turn_i = _advance_turn_index(turn_i)
         forced_turn = None
         selected = None
@@ -6977,7 +7287,7 @@ def main():
 
             return None
 
-        idx = TURN_ORDER.index(color)
+        idx = TURN_INDEX[color]
 
         for i in range(1, 5):
 
@@ -7031,13 +7341,7 @@ def main():
 
             for col in alive_effective:
 
-                gs.entered[col] = any(
-
-                    (board.get(r,c) and board.get(r,c).color == col and in_chess_area(r,c))
-
-                    for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)
-
-                )
+                gs.entered[col] = bool(board.bb[col] & INSIDE_MASK)
 
             # Duel-teleport rules: do not enable grace during prep; we'll teleport instead
 
@@ -7163,6 +7467,8 @@ def main():
 
                 p.kind = 'B'
 
+                board.refresh_square(r, c)
+
         if pick:
 
             gs.reduced_applied[color] = True
@@ -7209,12 +7515,18 @@ def main():
 
     CLICK_INDICATOR_MS = 400
 
-    click_indicator = None  # tuple (mx, my, until_ms)
+    click_indicator = None  # ClickIndicator or None
 
-    # Subtle move pulse animation: dict with 'square': (r,c) and 'until' ms timestamp
+    # Subtle move pulse animation: MovePulse (destination square + 'until' ms timestamp)
 
     move_pulse = None
 
+    # Dirty-rect presentation: on quiet frames only the ripple/pulse rects are pushed
+
+    frame_no = 0
+
+    last_sig, last_frame, last_animating, last_full_ms, last_rects = None, -1, False, 0, []
+
 
 
     HEADLESS_STATE_KEY = "_HEADLESS_STATE"
@@ -7809,6 +8121,10 @@ def main():
 
     while running:
 
+        frame_no += 1
+
+        frame_had_events = False
+
         # First-frame render to avoid initial black window. Done once to prevent sidebar doubling.
 
         if not first_frame_drawn:
@@ -7948,11 +8264,11 @@ def main():
 
                     screen.blit(veil, (0,0))
 
-                    title_font = pygame.font.SysFont("Arial", 40, bold=True)
+                    title_font = get_sidebar_font(40, True)
 
-                    info_font  = pygame.font.SysFont("Arial", 26, bold=True)
+                    info_font  = get_sidebar_font(26, True)
 
-                    sub_font   = pygame.font.SysFont("Arial", 22, bold=False)
+                    sub_font   = get_sidebar_font(22, False)
 
                     player_names = getattr(gs, 'player_names', {}) if hasattr(gs, 'player_names') else {}
 
@@ -8028,9 +8344,9 @@ def main():
 
                     screen.blit(veil, (0,0))
 
-                    title = pygame.font.SysFont("Arial", 40, bold=True)
+                    title = get_sidebar_font(40, True)
 
-                    sub   = pygame.font.SysFont("Arial", 22, bold=False)
+                    sub   = get_sidebar_font(22, False)
 
                     msg1 = "Draw by repetition"
 
@@ -8064,9 +8380,9 @@ def main():
 
                 screen.blit(veil, (0,0))
 
-                title = pygame.font.SysFont("Arial", 36, bold=True)
+                title = get_sidebar_font(36, True)
 
-                sub   = pygame.font.SysFont("Arial", 22, bold=False)
+                sub   = get_sidebar_font(22, False)
 
                 a = getattr(gs, 'final_a', None)
 
@@ -8248,7 +8564,11 @@ def main():
 
         # Do not forcibly reset freeze_advance each frame; timers and game_over manage it
 
-        for ev in pygame.event.get():
+        frame_events = pygame.event.get()
+
+        frame_had_events = bool(frame_events)
+
+        for ev in frame_events:
 
             # Very early event logging to help debug missing mouse clicks
 
@@ -8634,7 +8954,9 @@ def main():
 
                             try:
 
-                                print(f"[DRAG APPLY-UP] attempting board_do_move from {drag_start} -> ({dr},{dc})")
+                                if VERBOSE_DEBUG:
+
+                                    print(f"[DRAG APPLY-UP] attempting board_do_move from {drag_start} -> ({dr},{dc})")
 
                             except Exception:
 
@@ -8644,49 +8966,35 @@ def main():
 
                             cap, ph, pk, eff = board_do_move(board, sr, sc, dr, dc)
 
-                            try:
-
-                                print(f"[DRAG APPLY-UP] board_do_move returned cap={cap}, ph={ph}, pk={pk}, eff={eff}")
-
-                            except Exception:
-
-                                pass
-
-                            try:
-
-                                after_piece = board.get(dr, dc)
-
-                                print(f"[VERIFY MOVE] at ({dr},{dc}) exists={bool(after_piece)} id={id(after_piece) if after_piece else None} kind={(after_piece.kind if after_piece else None)}")
-
-                            except Exception as e:
-
-                                print(f"[VERIFY MOVE] exception checking board at ({dr},{dc}): {e}")
-
                             captured_piece = cap if cap else pre_target
 
                             mover_after = board.get(dr, dc)
 
-                            try:
+                            if VERBOSE_DEBUG:
 
-                                print(f"[DRAG APPLY-UP] mover_after at ({dr},{dc}) = {mover_after.kind if mover_after else None} color={(mover_after.color.name if mover_after else None)}")
+                                try:
 
-                                print(f"[BOARD SNAPSHOT] {dump_board(board)}")
+                                    print(f"[DRAG APPLY-UP] board_do_move returned cap={cap}, ph={ph}, pk={pk}, eff={eff}")
 
-                            except Exception:
+                                    print(f"[VERIFY MOVE] at ({dr},{dc}) exists={bool(mover_after)} id={id(mover_after) if mover_after else None} kind={(mover_after.kind if mover_after else None)}")
 
-                                pass
+                                    print(f"[BOARD SNAPSHOT] {dump_board(board)}")
+
+                                except Exception:
+
+                                    pass
 
                             promoted = bool(eff.get('promoted'))
 
                             if captured_piece: mat.on_capture(captured_piece)
 
+                            piece_letter = pk or (mover_after.kind if mover_after else '?')
+
                             moves_list.append(
 
                                 format_move_algebraic(GameState.turn_counter + 1, (TURN_ORDER[turn_i] if forced_turn is None else forced_turn),
 
-                                                     pk if pk else (mover_after.kind if mover_after else '?'),
-
-                                                     sr, sc, dr, dc, captured_piece, promoted)
+                                                     piece_letter, sr, sc, dr, dc, captured_piece, promoted)
 
                             )
 
@@ -8694,7 +9002,7 @@ def main():
 
                                 play_move_sound(captured_piece is not None)
 
-                                move_pulse = {'square': (dr, dc), 'until': pygame.time.get_ticks() + 360}
+                                move_pulse = MovePulse(dr, dc, pygame.time.get_ticks() + 360)
 
                             except Exception:
 
@@ -8708,9 +9016,7 @@ def main():
 
                             if gs.two_stage_active and (TURN_ORDER[turn_i] if forced_turn is None else forced_turn) in (gs.final_a, gs.final_b):
 
-                                if in_chess_area(dr,dc) or any(board.get(rr,cc) and board.get(rr,cc).color==(TURN_ORDER[turn_i] if forced_turn is None else forced_turn) and in_chess_area(rr,cc)
-
-                                                             for rr in range(BOARD_SIZE) for cc in range(BOARD_SIZE)):
+                                if _IN_CHESS_LUT[dr * BOARD_SIZE + dc] or board.bb[(TURN_ORDER[turn_i] if forced_turn is None else forced_turn)] & INSIDE_MASK:
 
                                     if not gs.entered[(TURN_ORDER[turn_i] if forced_turn is None else forced_turn)]:
 
@@ -8720,7 +9026,7 @@ def main():
 
                                         if reduced:
 
-                                            banner = f"{((TURN_ORDER[turn_i] if forced_turn is None else forced_turn).name)}: reduced {len(reduced)} Queen(s) to Bishop(s) on entry."
+                                            banner = ('queen_reduce', (TURN_ORDER[turn_i] if forced_turn is None else forced_turn), len(reduced))
 
                                     other = two_stage_opponent((TURN_ORDER[turn_i] if forced_turn is None else forced_turn))
 
@@ -8744,65 +9050,37 @@ def main():
 
                                     turn_i = _advance_turn_index(turn_i + 1)
 
-                                else:
-
-                                    turn_i = _advance_turn_index(TURN_ORDER.index((TURN_ORDER[turn_i] if forced_turn is None else forced_turn)) + 1)
-
-                            except Exception:
-
-                                pass
-
-
-
-                            victims = []
-
-                            for col in board.alive_colors():
-
-                                if col == (TURN_ORDER[turn_i] if forced_turn is None else forced_turn): continue
-
-                                if king_in_check(board, col):
-
-                                    victims.append(col)
-
-                            forced_turn = clockwise_from((TURN_ORDER[turn_i] if forced_turn is None else forced_turn), victims) if victims else None
-
-
-
-                            selected, moves = None, []
+                                else:
 
-                            GameState.turn_counter += 1
+                                    turn_i = _advance_turn_index((turn_i if forced_turn is None else TURN_INDEX[forced_turn]) + 1)
 
-                            gs.start_move_delay(MOVE_DELAY_MS)
+                            except Exception:
 
+                                pass
 
 
-                            # Force redraw and display update after drop
 
-                            try:
+                            mover_now = TURN_ORDER[turn_i] if forced_turn is None else forced_turn
 
-                                screen.fill((24, 40, 64))
+                            victims = check_victims(board, mover_now)
 
-                                draw_board(
+                            forced_turn = clockwise_from(mover_now, victims) if victims else None
 
-                                    screen, board, selected, moves, font, (TURN_ORDER[turn_i] if forced_turn is None else forced_turn),
 
-                                    banner_text=banner, ui_state_text=ui_state_text,
 
-                                    flash_color=gs.elim_flash_color, flash_on=gs.elim_flash_on
+                            selected, moves = None, []
 
-                                )
+                            GameState.turn_counter += 1
 
-                                draw_sidebar(screen, moves_list, sidebar_scroll, show_material, mat.captured_points, auto_elim_enabled, gs.two_stage_active, gs.grace_active)
+                            gs.start_move_delay(MOVE_DELAY_MS)
 
-                                pygame.display.flip()
 
-                                pygame.event.pump()
 
-                                pygame.time.wait(120)
+                            # Hold the next turn for 120 ms without blocking; the frame loop
 
-                            except Exception:
+                            # paints the new position and keeps draining events meanwhile
 
-                                pass
+                            gs.start_move_delay(120)
 
 
 
@@ -8890,6 +9168,8 @@ def main():
 
                                         board = Board()
 
+                                        _reset_ai_tables()
+
                                         mat = MaterialTracker()
 
                                         moves_list.clear()
@@ -9527,13 +9807,13 @@ def main():
 
                             if captured_piece: mat.on_capture(captured_piece)
 
+                            piece_letter = pk or (mover_after.kind if mover_after else '?')
+
                             moves_list.append(
 
                                 format_move_algebraic(GameState.turn_counter + 1, (TURN_ORDER[turn_i] if forced_turn is None else forced_turn),
 
-                                                     pk if pk else (mover_after.kind if mover_after else '?'),
-
-                                                     sr, sc, dr, dc, captured_piece, promoted)
+                                                     piece_letter, sr, sc, dr, dc, captured_piece, promoted)
 
                             )
 
@@ -9541,7 +9821,7 @@ def main():
 
                                 play_move_sound(captured_piece is not None)
 
-                                move_pulse = {'square': (dr, dc), 'until': pygame.time.get_ticks() + 360}
+                                move_pulse = MovePulse(dr, dc, pygame.time.get_ticks() + 360)
 
                             except Exception:
 
@@ -9555,9 +9835,7 @@ def main():
 
                             if gs.two_stage_active and (TURN_ORDER[turn_i] if forced_turn is None else forced_turn) in (gs.final_a, gs.final_b):
 
-                                if in_chess_area(dr,dc) or any(board.get(rr,cc) and board.get(rr,cc).color==(TURN_ORDER[turn_i] if forced_turn is None else forced_turn) and in_chess_area(rr,cc)
-
-                                                             for rr in range(BOARD_SIZE) for cc in range(BOARD_SIZE)):
+                                if _IN_CHESS_LUT[dr * BOARD_SIZE + dc] or board.bb[(TURN_ORDER[turn_i] if forced_turn is None else forced_turn)] & INSIDE_MASK:
 
                                     if not gs.entered[(TURN_ORDER[turn_i] if forced_turn is None else forced_turn)]:
 
@@ -9567,7 +9845,7 @@ def main():
 
                                         if reduced:
 
-                                            banner = f"{((TURN_ORDER[turn_i] if forced_turn is None else forced_turn).name)}: reduced {len(reduced)} Queen(s) to Bishop(s) on entry."
+                                            banner = ('queen_reduce', (TURN_ORDER[turn_i] if forced_turn is None else forced_turn), len(reduced))
 
                                     other = two_stage_opponent((TURN_ORDER[turn_i] if forced_turn is None else forced_turn))
 
@@ -9595,7 +9873,7 @@ def main():
 
                                 else:
 
-                                    turn_i = _advance_turn_index(TURN_ORDER.index((TURN_ORDER[turn_i] if forced_turn is None else forced_turn)) + 1)
+                                    turn_i = _advance_turn_index((turn_i if forced_turn is None else TURN_INDEX[forced_turn]) + 1)
 
                             except Exception:
 
@@ -9603,17 +9881,11 @@ def main():
 
 
 
-                            victims = []
+                            mover_now = TURN_ORDER[turn_i] if forced_turn is None else forced_turn
 
-                            for col in board.alive_colors():
+                            victims = check_victims(board, mover_now)
 
-                                if col == (TURN_ORDER[turn_i] if forced_turn is None else forced_turn): continue
-
-                                if king_in_check(board, col):
-
-                                    victims.append(col)
-
-                            forced_turn = clockwise_from((TURN_ORDER[turn_i] if forced_turn is None else forced_turn), victims) if victims else None
+                            forced_turn = clockwise_from(mover_now, victims) if victims else None
 
 
 
@@ -9795,7 +10067,7 @@ def main():
 
                             eliminate_color(board, gs, col, reason="resign", flash=True)
 
-                            banner = f"{col.name} resigned."
+                            banner = ('resigned', col)
 
                             break
 
@@ -9829,7 +10101,7 @@ def main():
 
                     try:
 
-                        click_indicator = (mx, my, pygame.time.get_ticks() + CLICK_INDICATOR_MS)
+                        click_indicator = ClickIndicator(mx, my, pygame.time.get_ticks() + CLICK_INDICATOR_MS)
 
                     except Exception:
 
@@ -10189,33 +10461,33 @@ def main():
 
                                 pass
 
-                            promoted = bool(eff.get('promoted'))
+                        promoted = bool(eff.get('promoted'))
 
-                            if captured_piece: mat.on_capture(captured_piece)
+                        if captured_piece: mat.on_capture(captured_piece)
 
-                            # Prefer SAN from python-chess during chess-lock
+                        # Prefer SAN from python-chess during chess-lock
 
-                            if getattr(gs, 'chess_lock', False) and eff.get('san'):
+                        if getattr(gs, 'chess_lock', False) and eff.get('san'):
 
-                                moves_list.append(f"{GameState.turn_counter + 1}. {active_color.name}: {eff['san']}")
+                            moves_list.append(f"{GameState.turn_counter + 1}. {active_color.name}: {eff['san']}")
 
-                            else:
+                        else:
 
-                                moves_list.append(
+                            piece_letter = pk or (mover_after.kind if mover_after else '?')
 
-                                    format_move_algebraic(GameState.turn_counter + 1, active_color,
+                            moves_list.append(
 
-                                                         pk if pk else (mover_after.kind if mover_after else '?'),
+                                format_move_algebraic(GameState.turn_counter + 1, active_color,
 
-                                                         selected[0], selected[1], r, c, captured_piece, promoted)
+                                                     piece_letter, selected[0], selected[1], r, c, captured_piece, promoted)
 
-                                )
+                            )
 
                         try:
 
                             play_move_sound(captured_piece is not None)
 
-                            move_pulse = {'square': (r, c), 'until': pygame.time.get_ticks() + 360}
+                            move_pulse = MovePulse(r, c, pygame.time.get_ticks() + 360)
 
                         except Exception:
 
@@ -10229,9 +10501,7 @@ def main():
 
                         if gs.two_stage_active and active_color in (gs.final_a, gs.final_b):
 
-                            if in_chess_area(r,c) or any(board.get(rr,cc) and board.get(rr,cc).color==active_color and in_chess_area(rr,cc)
-
-                                                         for rr in range(BOARD_SIZE) for cc in range(BOARD_SIZE)):
+                            if _IN_CHESS_LUT[r * BOARD_SIZE + c] or board.bb[active_color] & INSIDE_MASK:
 
                                 if not gs.entered[active_color]:
 
@@ -10241,7 +10511,7 @@ def main():
 
                                     if reduced:
 
-                                        banner = f"{active_color.name}: reduced {len(reduced)} Queen(s) to Bishop(s) on entry."
+                                        banner = ('queen_reduce', active_color, len(reduced))
 
                                 other = two_stage_opponent(active_color)
 
@@ -10279,7 +10549,7 @@ def main():
 
                                 # Move just played by 'active_color' as defender
 
-                                turn_i = (TURN_ORDER.index(active_color) + 1) % 4
+                                turn_i = (TURN_INDEX[active_color] + 1) % 4
 
                         except Exception:
 
@@ -10287,15 +10557,7 @@ def main():
 
 
 
-                        victims = []
-
-                        for col in board.alive_colors():
-
-                            if col == active_color: continue
-
-                            if king_in_check(board, col):
-
-                                victims.append(col)
+                        victims = check_victims(board, active_color)
 
                         forced_turn = clockwise_from(active_color, victims) if victims else None
 
@@ -10327,33 +10589,11 @@ def main():
 
                             pass
 
-                        # Force redraw and display update after each HUMAN move (click)
-
-                        try:
-
-                            screen.fill((24, 40, 64))
-
-                            draw_board(
-
-                                screen, board, selected, moves, font, active_color,
-
-                                banner_text=banner, ui_state_text=ui_state_text,
-
-                                flash_color=gs.elim_flash_color, flash_on=gs.elim_flash_on
-
-                            )
-
-                            draw_sidebar(screen, moves_list, sidebar_scroll, show_material, mat.captured_points, auto_elim_enabled, gs.two_stage_active, gs.grace_active)
+                        # Hold the next turn for 120 ms without blocking; the frame loop
 
-                            pygame.display.flip()
+                        # paints the new position and keeps draining events meanwhile
 
-                            pygame.event.pump()
-
-                            pygame.time.wait(120)
-
-                        except Exception:
-
-                            pass
+                        gs.start_move_delay(120)
 
                         # Immediate end-of-game detection after a move (prevents extra moves and black frame)
 
@@ -10473,15 +10713,9 @@ def main():
 
                 to_remove = gs._last_flash_color
 
-                for rr in range(BOARD_SIZE):
-
-                    for cc in range(BOARD_SIZE):
-
-                        t = board.get(rr, cc)
-
-                        if t and t.color == to_remove:
+                _remove_color_pieces(board, to_remove)
 
-                            board.set(rr, cc, None)
+                assert board.find_king(to_remove) is None
 
                 if forced_turn == gs._last_flash_color:
 
@@ -10593,7 +10827,7 @@ def main():
 
                     try:
 
-                        ni = (TURN_ORDER.index(active_color) + 1) % 4
+                        ni = (TURN_INDEX[active_color] + 1) % 4
 
                         # skip dead kings
 
@@ -10745,13 +10979,13 @@ def main():
 
                 if victim: mat.on_capture(victim)
 
+                piece_letter = pk or (mover_after.kind if mover_after else '?')
+
                 moves_list.append(
 
                     format_move_algebraic(GameState.turn_counter + 1, active_color,
 
-                                         pk if pk else (mover_after.kind if mover_after else '?'),
-
-                                         sr, sc, er, ec, victim, promoted)
+                                         piece_letter, sr, sc, er, ec, victim, promoted)
 
                 )
 
@@ -10771,7 +11005,7 @@ def main():
 
                     play_move_sound(victim is not None)
 
-                    move_pulse = {'square': (er, ec), 'until': pygame.time.get_ticks() + 360}
+                    move_pulse = MovePulse(er, ec, pygame.time.get_ticks() + 360)
 
                 except Exception:
 
@@ -10785,9 +11019,7 @@ def main():
 
                 if gs.two_stage_active and active_color in (gs.final_a, gs.final_b):
 
-                    if in_chess_area(er,ec) or any(board.get(rr,cc) and board.get(rr,cc).color==active_color and in_chess_area(rr,cc)
-
-                                                   for rr in range(BOARD_SIZE) for cc in range(BOARD_SIZE)):
+                    if _IN_CHESS_LUT[er * BOARD_SIZE + ec] or board.bb[active_color] & INSIDE_MASK:
 
                         if not gs.entered[active_color]:
 
@@ -10797,7 +11029,7 @@ def main():
 
                             if reduced:
 
-                                banner = f"{active_color.name}: reduced {len(reduced)} Queen(s) to Bishop(s) on entry."
+                                banner = ('queen_reduce', active_color, len(reduced))
 
                         other = two_stage_opponent(active_color)
 
@@ -10817,37 +11049,19 @@ def main():
 
 
 
-                # Force redraw and display update after each AI move
-
-                # Paint quickly so the UI stays responsive between AI choices
-
-                screen.fill((24, 40, 64))
-
-                draw_board(
-
-                    screen, board, selected, moves, font, active_color,
-
-                    banner_text=banner, ui_state_text=ui_state_text,
-
-                    flash_color=gs.elim_flash_color, flash_on=gs.elim_flash_on
-
-                )
-
-                draw_sidebar(screen, moves_list, sidebar_scroll, show_material, mat.captured_points, auto_elim_enabled, gs.two_stage_active, gs.grace_active)
-
-                pygame.display.flip()
+                # Hold the next turn for 120 ms without blocking: the frame loop keeps
 
-                pygame.event.pump()
+                # draining events and paints the new position on this same pass
 
-                pygame.time.wait(120)
+                gs.start_move_delay(120)
 
 
 
                 # Immediate end-of-game detection after AI move
 
-                try:
+                alive_now = board.alive_colors()
 
-                    alive_now = board.alive_colors()
+                try:
 
                     if len(alive_now) == 1:
 
@@ -10889,7 +11103,7 @@ def main():
 
                         # Move just played by 'active_color' as defender
 
-                        turn_i = (TURN_ORDER.index(active_color) + 1) % 4
+                        turn_i = (TURN_INDEX[active_color] + 1) % 4
 
                 except Exception:
 
@@ -10897,15 +11111,7 @@ def main():
 
 
 
-                victims = []
-
-                for col in board.alive_colors():
-
-                    if col == active_color: continue
-
-                    if king_in_check(board, col):
-
-                        victims.append(col)
+                victims = check_victims(board, active_color)
 
                 forced_turn = clockwise_from(active_color, victims) if victims else None
 
@@ -11035,6 +11241,39 @@ def main():
 
         # Robust per-frame draw: always clear to a visible background, attempt normal drawing
 
+        frame_sig = (board.zhash, selected, tuple(moves) if moves else (), turn_i, forced_turn,
+
+                     banner, ui_state_text, gs.elim_flash_color, gs.elim_flash_on,
+
+                     len(moves_list), sidebar_scroll, show_material, auto_elim_enabled,
+
+                     gs.two_stage_active, gs.grace_active, game_over, screen.get_size())
+
+        frame_ms = pygame.time.get_ticks()  # one clock read serves the idle test, overlays and present
+
+        # Idle frame: same state as the last presented frame, no input, no overlay running
+        # and no pending duel resume (draw_board applies that). The window already shows
+        # this frame, so skip drawing and presenting; a full redraw still happens at least
+        # every FULL_PRESENT_MS so countdowns and timers keep ticking.
+
+        if (frame_sig == last_sig and last_frame == frame_no - 1 and not frame_had_events
+
+                and not last_animating and click_indicator is None and move_pulse is None
+
+                and getattr(gs, '_duel_delay_until', None) is None
+
+                and frame_ms - last_full_ms < FULL_PRESENT_MS):
+
+            last_frame, last_rects = frame_no, []
+
+            clock.tick(60)
+
+            continue
+
+        frame_dirty = []
+
+        UI_STATE['animating'] = False
+
         try:
 
             screen.fill((24, 40, 64))
@@ -11051,29 +11290,23 @@ def main():
 
             try:
 
-                now = pygame.time.get_ticks()
+                now = frame_ms
 
                 if click_indicator is not None:
 
-                    cx, cy, until = click_indicator
+                    until = click_indicator.until
 
                     if now < until:
 
-                        # ripple ring that fades
-
-                        life = max(0, until - now)
-
-                        frac = life / CLICK_INDICATOR_MS
-
-                        rad = int(6 + frac * 10)
+                        # ripple ring that fades (integer math: radius 16 -> 6, alpha 140 -> 0)
 
-                        alpha = int(140 * frac)
+                        life = until - now
 
-                        ring = pygame.Surface((rad*2+2, rad*2+2), pygame.SRCALPHA)
+                        rad = 6 + 10 * life // CLICK_INDICATOR_MS
 
-                        pygame.draw.circle(ring, (255,255,255, alpha), (rad+1, rad+1), rad, 2)
+                        ring = _click_ring(rad, 140 * life // CLICK_INDICATOR_MS)
 
-                        screen.blit(ring, (cx - rad - 1, cy - rad - 1))
+                        frame_dirty.append(screen.blit(ring, (click_indicator.cx - rad - 1, click_indicator.cy - rad - 1)))
 
                     else:
 
@@ -11083,25 +11316,19 @@ def main():
 
                 if move_pulse is not None:
 
-                    until = move_pulse.get('until', 0)
+                    until = move_pulse.until
 
-                    sq = move_pulse.get('square')
-
-                    if sq is not None and now < until:
-
-                        mr, mc = sq
-
-                        life = max(0, until - now)
+                    if now < until:
 
-                        frac = life / 320.0
+                        a = 3 * (until - now) >> 3  # == int(120 * life / 320)
 
-                        a = int(120 * frac)
+                        glow = _pulse_surface()
 
-                        glow = pygame.Surface((SQUARE, SQUARE), pygame.SRCALPHA)
+                        glow.fill((0, 0, 0, 0))
 
                         pygame.draw.rect(glow, (120, 220, 160, a), (4,4,SQUARE-8,SQUARE-8), 2)
 
-                        screen.blit(glow, (mc*SQUARE, mr*SQUARE))
+                        frame_dirty.append(screen.blit(glow, (move_pulse.c*SQUARE, move_pulse.r*SQUARE)))
 
                     else:
 
@@ -11119,7 +11346,7 @@ def main():
 
                 screen.fill((90, 20, 20))
 
-                err_font = pygame.font.SysFont('Arial', 20)
+                err_font = get_sidebar_font(20, False)
 
                 lines = [f'Draw error: {str(e)}', 'Check console for traceback. Press B to dump state.']
 
@@ -11135,9 +11362,43 @@ def main():
 
                 screen.fill((120, 20, 20))
 
+            frame_sig = None
+
         finally:
 
-            pygame.display.flip()
+            # A frame is quiet when nothing the board/sidebar draw from changed since the
+
+            # last presented frame, no input arrived and no timed overlay ran (now or last
+
+            # frame). Then only the ripple/pulse rects, old and new, need pushing; anything
+
+            # else (and at least every FULL_PRESENT_MS) flips the whole window.
+
+            now_p = frame_ms
+
+            animating = bool(UI_STATE.get('animating'))
+
+            quiet = (frame_sig is not None and frame_sig == last_sig
+
+                     and last_frame == frame_no - 1
+
+                     and not frame_had_events and not animating and not last_animating
+
+                     and now_p - last_full_ms < FULL_PRESENT_MS)
+
+            if quiet:
+
+                if frame_dirty or last_rects:
+
+                    pygame.display.update(last_rects + frame_dirty)
+
+            else:
+
+                pygame.display.flip()
+
+                last_full_ms = now_p
+
+            last_sig, last_frame, last_animating, last_rects = frame_sig, frame_no, animating, frame_dirty
 
             clock.tick(60)
 
@@ -11176,7 +11437,7 @@ if __name__ == "__main__":
             # Self-test suite wired here to keep tests in the Golden file
             globals()['HEADLESS_ENABLED'] = True
 
-            import random as _rnd
+
 
 
 
@@ -11208,10 +11469,6 @@ if __name__ == "__main__":
 
                 _ST_ORIG_DO = globals().get('board_do_move')
 
-                def _st_in8(rr, cc):
-
-                    return CH_MIN <= rr <= CH_MAX and CH_MIN <= cc <= CH_MAX
-
                 def _st_alive_effective(bd: 'Board', state: 'GameState'):
 
                     alive = bd.alive_colors()
@@ -11222,15 +11479,7 @@ if __name__ == "__main__":
 
                 def _st_purge(bd: 'Board'):
 
-                    for rr in range(BOARD_SIZE):
-
-                        for cc in range(BOARD_SIZE):
-
-                            p = bd.get(rr, cc)
-
-                            if p and p.kind != 'K' and not _st_in8(rr, cc):
-
-                                bd.set(rr, cc, None)
+                    bd.clear_squares(bd.outside_non_kings())
 
                 def _st_activate_if_needed(bd: 'Board', state: 'GameState'):
 
@@ -11296,8 +11545,32 @@ if __name__ == "__main__":
 
                             state.chess_lock = True
 
+                # Legal-move cache: key is the board's Zobrist hash plus the square, the asking
+
+                # colour and the gs flags the filter reads; emptied on every real move.
+
+                _st_legal_cache = {}
+
                 def _st_legal(board: 'Board', r: int, c: int, active_color: 'PColor'=None):
 
+                    state = globals().get('gs')
+
+                    key = (board.zhash, r, c, active_color, id(state), getattr(state, 'two_stage_active', False), getattr(state, 'chess_lock', False))
+
+                    hit = _st_legal_cache.get(key)
+
+                    if hit is not None:
+
+                        return list(hit)
+
+                    moves = _st_legal_uncached(board, r, c, active_color)
+
+                    _st_legal_cache[key] = tuple(moves)
+
+                    return moves
+
+                def _st_legal_uncached(board: 'Board', r: int, c: int, active_color: 'PColor'=None):
+
                     base = _ST_ORIG_LEGAL(board, r, c, active_color)
 
                     # Normalize to list of 4-tuples (sr,sc,er,ec) regardless of source shape
@@ -11340,47 +11613,43 @@ if __name__ == "__main__":
 
                     # pieces already inside cannot move until entry is complete.
 
-                    def _st_color_has_outside(bd: 'Board', col: 'PColor') -> bool:
+                    if _has_piece_outside(board, ac) and _IN_CHESS_LUT[r * BOARD_SIZE + c]:
 
-                        for rr in range(BOARD_SIZE):
-
-                            for cc in range(BOARD_SIZE):
-
-                                qq = bd.get(rr, cc)
+                        return []
 
-                                if qq and qq.color == col and not _st_in8(rr, cc):
+                    # Non-king: stay inside 8x8
 
-                                    return True
+                    if p.kind != 'K':
 
-                        return False
+                        return [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if _IN_CHESS_LUT[er * BOARD_SIZE + ec]]
 
-                    if _st_color_has_outside(board, ac) and _st_in8(r, c):
+                    # King outside: do not worsen distance; prefer strictly closer if present
 
-                        return []
+                    if not _IN_CHESS_LUT[r * BOARD_SIZE + c]:
 
-                    # Non-king: stay inside 8x8
+                        # one pass: strictly-closer moves win; level moves are only kept until one shows up
 
-                    if p.kind != 'K':
+                        cur = _DIST_LUT[r * BOARD_SIZE + c]
 
-                        return [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if _st_in8(er, ec)]
+                        closer, level = [], []
 
-                    # King outside: do not worsen distance; prefer strictly closer if present
+                        for m in base_norm:
 
-                    if not _st_in8(r, c):
+                            d = _DIST_LUT[m[2] * BOARD_SIZE + m[3]]
 
-                        cur = dist_to_chess(r, c)
+                            if d < cur:
 
-                        closer = [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if dist_to_chess(er, ec) < cur]
+                                closer.append(m)
 
-                        if closer:
+                            elif d == cur and not closer:
 
-                            return closer
+                                level.append(m)
 
-                        return [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if dist_to_chess(er, ec) == cur]
+                        return closer or level
 
                     # King inside: stay inside
 
-                    return [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if _st_in8(er, ec)]
+                    return [(sr, sc, er, ec) for (sr, sc, er, ec) in base_norm if _IN_CHESS_LUT[er * BOARD_SIZE + ec]]
 
                 def _st_do(board: 'Board', sr, sc, er, ec, simulate=False):
 
@@ -11388,6 +11657,8 @@ if __name__ == "__main__":
 
                     if not simulate:
 
+                        _st_legal_cache.clear()
+
                         try:
 
                             _st_activate_if_needed(board, globals().get('gs'))
@@ -11412,21 +11683,13 @@ if __name__ == "__main__":
 
 
 
-            def _clear_board(bd: 'Board'):
-
-                for _r in range(14):
 
-                    for _c in range(14):
-
-                        bd.set(_r, _c, None)
 
 
 
             def _setup_3p():
 
-                bd = Board()
-
-                _clear_board(bd)
+                bd = Board.empty()
 
                 bd.set(6, 3, Piece('K', PColor.WHITE))
 
@@ -11448,7 +11711,7 @@ if __name__ == "__main__":
 
             def _alive_next(bd: 'Board', me: 'PColor'):
 
-                idx = TURN_ORDER.index(me)
+                idx = TURN_INDEX[me]
 
                 for i in range(1,5):
 
@@ -11486,9 +11749,7 @@ if __name__ == "__main__":
 
                 _reset_state()
 
-                b = Board()
-
-                _clear_board(b)
+                b = Board.empty()
 
                 # Cases: (color_name, start(r,c), end(r,c))
 
@@ -11528,7 +11789,7 @@ if __name__ == "__main__":
 
             def _test_ai3():
 
-                _rnd.seed(0)
+                random.seed(0)
 
                 BD = _setup_3p()
 
@@ -11584,9 +11845,7 @@ if __name__ == "__main__":
 
                 _reset_state()
 
-                b = Board()
-
-                _clear_board(b)
+                b = Board.empty()
 
                 # Kings only alive (two colors)
 
@@ -11652,9 +11911,7 @@ if __name__ == "__main__":
 
                 _reset_state()
 
-                b = Board()
-
-                _clear_board(b)
+                b = Board.empty()
 
                 # Place both kings inside to simplify
 
@@ -11718,9 +11975,7 @@ if __name__ == "__main__":
 
                 _reset_state()
 
-                b = Board()
-
-                _clear_board(b)
+                b = Board.empty()
 
                 # Place one king far outside, opponent king anywhere
 
@@ -11762,7 +12017,7 @@ if __name__ == "__main__":
 
                         er, ec = mv[-2], mv[-1]
 
-                    d = dist_to_chess(er, ec)
+                    d = _DIST_LUT[er * BOARD_SIZE + ec]
 
                     dists.append(d)
 
@@ -11790,9 +12045,7 @@ if __name__ == "__main__":
 
                 _reset_state()
 
-                b = Board()
-
-                _clear_board(b)
+                b = Board.empty()
 
                 # Only two kings alive to trigger activation
 
@@ -11878,17 +12131,7 @@ if __name__ == "__main__":
 
                     for pcol, (r0, c0) in CORNER_RECTS.items():
 
-                        cells = []
-
-                        for dr in (0,1):
-
-                            for dc in (0,1):
-
-                                rr, cc = _transform_rc_for_view(r0+dr, c0+dc)
-
-                                cells.append((rr, cc))
-
-                        uniq = set(cells)
+                        uniq = {_transform_rc_for_view(r0+dr, c0+dc) for dr in (0,1) for dc in (0,1)}
 
                         if len(uniq) != 4:
 
@@ -11942,11 +12185,11 @@ if __name__ == "__main__":
 
             def _test_freeze_inside_all():
 
-                def _setup(color: 'PColor'):
+                def _setup(b: 'Board', color: 'PColor'):
 
                     _reset_state()
 
-                    b = Board(); _clear_board(b)
+                    b.reset_empty()
 
                     # Place opponent king inside to ensure two-player activation can proceed
 
@@ -12016,25 +12259,17 @@ if __name__ == "__main__":
 
                 colors = [PColor.WHITE, PColor.GREY, PColor.BLACK, PColor.PINK]
 
-                for col in colors:
-
-                    b = _setup(col)
-
-                    # Locate the inside rook and verify no moves
+                # One board serves every colour; _setup clears it in place
 
-                    rook_pos = None
+                b = Board.empty()
 
-                    for rr in range(BOARD_SIZE):
-
-                        for cc in range(BOARD_SIZE):
-
-                            p = b.get(rr, cc)
+                for col in colors:
 
-                            if p and p.color == col and p.kind == 'R' and in_chess_area(rr, cc):
+                    _setup(b, col)
 
-                                rook_pos = (rr, cc); break
+                    # Locate the inside rook (first in row-major order) from the colour/kind index
 
-                        if rook_pos: break
+                    rook_pos = bb_first(b.pieces_of(col, 'R') & INSIDE_MASK)
 
                     if not rook_pos:
 
@@ -12042,9 +12277,7 @@ if __name__ == "__main__":
 
                         return 2
 
-                    rm = legal_moves_for_piece(b, rook_pos[0], rook_pos[1], col)
-
-                    if rm:
+                    if legal_destinations_bb(b, rook_pos[0], rook_pos[1], col):
 
                         print(f"[SELF-TEST FAIL] freeze_inside: rook had moves while king outside for {col.name}")
 
@@ -12052,21 +12285,9 @@ if __name__ == "__main__":
 
                     # Move king one step into the 8-8
 
-                    # Find king position
-
-                    kp = None
-
-                    for rr in range(BOARD_SIZE):
-
-                        for cc in range(BOARD_SIZE):
-
-                            p = b.get(rr, cc)
+                    # Find king position (cached by Board.set)
 
-                            if p and p.color == col and p.kind == 'K':
-
-                                kp = (rr, cc); break
-
-                        if kp: break
+                    kp = b.find_king(col)
 
                     if not kp:
 
@@ -12078,13 +12299,7 @@ if __name__ == "__main__":
 
                     # Pick a move that enters 8-8
 
-                    enter = None
-
-                    for (sr, sc, er, ec) in km:
-
-                        if in_chess_area(er, ec):
-
-                            enter = (sr, sc, er, ec); break
+                    enter = next((m for m in km if _IN_CHESS_LUT[m[2] * BOARD_SIZE + m[3]]), None)
 
                     if not enter:
 
@@ -12104,9 +12319,7 @@ if __name__ == "__main__":
 
                     # Now rook should have legal moves
 
-                    rm2 = legal_moves_for_piece(b, rook_pos[0], rook_pos[1], col)
-
-                    if not rm2:
+                    if not legal_destinations_bb(b, rook_pos[0], rook_pos[1], col):
 
                         print(f"[SELF-TEST FAIL] freeze_inside: rook still frozen after king entry for {col.name}")
 
@@ -12128,8 +12341,6 @@ if __name__ == "__main__":
 
                 try:
 
-                    sys.path.append(os.path.join(SCRIPT_DIR, 'tools'))
-
                     from export_rules import main as export_rules_main  # type: ignore
 
                 except Exception as e:
@@ -12144,14 +12355,38 @@ if __name__ == "__main__":
 
                         return 2
 
-                out_dir = os.path.join(SCRIPT_DIR, 'docs')
-
-                rc = export_rules_main(['--out', out_dir, '--quiet'])
-
+                out_dir = DOCS_DIR
+                txt_path = RULES_TXT_PATH
+                # The exporter re-executes this whole file; skip it when rules.txt was produced from the
+                # current RULES_REFERENCE by the current exporter and has not changed since. The sidecar
+                # (git-ignored) records "<inputs sha256> <rules.txt sha256>" from the last successful export;
+                # BISHOPS_FORCE_RULES_EXPORT=1 ignores it and always runs the exporter.
+                import hashlib
+                stamp_path = txt_path + '.sha256'
+                inputs = hashlib.sha256(RULES_REFERENCE.encode('utf-8'))
+                try:
+                    with open(sys.modules[export_rules_main.__module__].__file__, 'rb') as f:
+                        inputs.update(f.read())
+                    with open(txt_path, 'rb') as f:
+                        txt_digest = hashlib.sha256(f.read()).hexdigest()
+                    with open(stamp_path, 'r', encoding='utf-8') as f:
+                        up_to_date = f.read().split() == [inputs.hexdigest(), txt_digest]
+                except Exception:
+                    up_to_date = False
+                if up_to_date and os.environ.get('BISHOPS_FORCE_RULES_EXPORT', '') not in ('1', 'true', 'yes'):
+                    rc = 0
+                else:
+                    rc = export_rules_main(['--out', out_dir, '--quiet'])
+                    if rc in (0, 1):
+                        try:
+                            with open(txt_path, 'rb') as f:
+                                txt_digest = hashlib.sha256(f.read()).hexdigest()
+                            with open(stamp_path, 'w', encoding='utf-8') as f:
+                                f.write(f"{inputs.hexdigest()} {txt_digest}\n")
+                        except Exception:
+                            pass
                 # Check TXT
 
-                txt_path = os.path.join(out_dir, 'rules.txt')
-
                 if not os.path.exists(txt_path):
 
                     print('[SELF-TEST FAIL] rules_exporter: rules.txt not created')
@@ -12170,11 +12405,18 @@ if __name__ == "__main__":
 
                     REQUIRED_TAIL = 'To prevent unauthorized reproduction a minor false rule has been included in this limited edition.'
 
-                    with open(txt_path, 'r', encoding='utf-8') as f:
-
-                        lines = [ln.rstrip() for ln in f.readlines() if ln.strip() != '']
-
-                    if not lines or lines[-1] != REQUIRED_TAIL:
+                    # Only the last non-blank line matters: read a small window at EOF, whole file if needed
+                    with open(txt_path, 'rb') as f:
+                        f.seek(0, 2)
+                        size = f.tell()
+                        f.seek(max(0, size - 4096))
+                        tail = f.read().decode('utf-8', 'replace')
+                        last = next((ln.rstrip() for ln in reversed(tail.splitlines()) if ln.strip()), None)
+                        if last is None and size > 4096:
+                            f.seek(0)
+                            tail = f.read().decode('utf-8', 'replace')
+                            last = next((ln.rstrip() for ln in reversed(tail.splitlines()) if ln.strip()), None)
+                    if last != REQUIRED_TAIL:
 
                         print('[SELF-TEST FAIL] rules_exporter: required tail not last line')
 
@@ -12224,25 +12466,17 @@ if __name__ == "__main__":
 
                 # Back rank (row 11): remove N,B,Q between a/h rooks and king at col 6
 
-                for cc in range(2, 10):
-
-                    q = b.get(11, cc)
-
-                    if q and q.color == PColor.WHITE and q.kind in ('N','B','Q'):
+                blockers = b.pieces_of(PColor.WHITE, 'N') | b.pieces_of(PColor.WHITE, 'B') | b.pieces_of(PColor.WHITE, 'Q')
 
-                        b.set(11, cc, None)
+                b.clear_squares(blockers & (((1 << BOARD_SIZE) - 1) << (11 * BOARD_SIZE)))
 
-                # Clear pawns in front to avoid simple attacks
+                # Clear pawns in front to avoid simple attacks (row 10, cols 2..9)
 
-                for cc in range(2, 10):
+                b.clear_squares(((1 << 8) - 1) << (10 * BOARD_SIZE + 2))
 
-                    b.set(10, cc, None)
+                dests_bb = legal_destinations_bb(b, 11, 6, PColor.WHITE)
 
-                mv = legal_moves_for_piece(b, 11, 6, PColor.WHITE)
-
-                dests = {(er, ec) for (_, _, er, ec) in mv}
-
-                ok = ((11, 8) in dests) or ((11, 4) in dests)
+                ok = bool(dests_bb & ((1 << (11 * BOARD_SIZE + 8)) | (1 << (11 * BOARD_SIZE + 4))))
 
                 print('[SELF-TEST PASS] short_castling_basic' if ok else '[SELF-TEST FAIL] short_castling_basic')
 
@@ -12252,13 +12486,11 @@ if __name__ == "__main__":
 
             def _test_buttons_headless():
 
-                import os
-
                 from pathlib import Path
 
                 os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
 
-                rules_dir = Path(SCRIPT_DIR) / "docs"
+                rules_dir = Path(DOCS_DIR)
 
                 try:
 
@@ -12354,53 +12586,31 @@ if __name__ == "__main__":
 
                     print("[SELF-TEST buttons] startfile not invoked (headless skip)")
 
-                if export_path.exists():
-
-                    try:
-
-                        export_size = export_path.stat().st_size
-
-                    except Exception as exc:
-
-                        fails.append(f"btn_export: cannot stat bishops_moves.txt ({exc})")
-
-                    else:
-
-                        if export_size <= 0:
+                # One stat() per file: a missing file shows up as FileNotFoundError rather than an exists() probe
 
-                            fails.append("btn_export: bishops_moves.txt empty")
+                for key, path, label in (('btn_export', export_path, 'bishops_moves.txt'), ('btn_rules_pdf', rules_txt, 'rules.txt')):
 
-                        else:
-
-                            print(f"[SELF-TEST buttons] bishops_moves.txt size={export_size}")
-
-                else:
-
-                    fails.append("btn_export: bishops_moves.txt missing")
+                    try:
 
-                if rules_txt.exists():
+                        size = path.stat().st_size
 
-                    try:
+                    except FileNotFoundError:
 
-                        rules_size = rules_txt.stat().st_size
+                        fails.append(f"{key}: {label} missing")
 
                     except Exception as exc:
 
-                        fails.append(f"btn_rules_pdf: cannot stat rules.txt ({exc})")
+                        fails.append(f"{key}: cannot stat {label} ({exc})")
 
                     else:
 
-                        if rules_size <= 0:
+                        if size <= 0:
 
-                            fails.append("btn_rules_pdf: rules.txt empty")
+                            fails.append(f"{key}: {label} empty")
 
                         else:
 
-                            print(f"[SELF-TEST buttons] rules.txt size={rules_size}")
-
-                else:
-
-                    fails.append("btn_rules_pdf: rules.txt missing")
+                            print(f"[SELF-TEST buttons] {label} size={size}")
 
                 if fails:
 
@@ -12444,6 +12654,12 @@ if __name__ == "__main__":
 
             }
 
+            # Tests that patch process-wide hooks (os.startfile) stay in the main process
+            SERIAL_TESTS = {'buttons'}
+
+            # Summary label per exit code; any other code reports as EXC
+            SELFTEST_STATUS = {0: 'PASS', 1: 'WARN', 2: 'FAIL'}
+
 
 
             if selector == 'all':
@@ -12452,57 +12668,58 @@ if __name__ == "__main__":
 
                 order = ['corners_view', 'ai3', 'tp_activate', 'tp_nonking', 'tp_king', 'tp_pause', 'freeze_inside', 'promo_edges', 'short_castle', 'rules_exporter']
 
-                results = []
-
-                codes = []
-
-                for name in order:
-
+                def _run_self_test(name):
                     try:
-
-                        code = tests[name]()
-
-                    except SystemExit as _e:
-
+                        return tests[name]()
+                    except SystemExit:
                         raise
-
                     except Exception as e:
-
                         print(f"[SELF-TEST EXC] {name}: {e}")
+                        return 3
 
-                        code = 3
-
-                    codes.append(code)
-
-                    results.append((name, code))
+                # The tests are independent and CPU-bound: run them in forked workers (each starts
+                # from this process's state, so nothing is re-imported). Without fork, run serially.
+                code_by_name = {}
+                pooled = [name for name in order if name not in SERIAL_TESTS]
+                try:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    if len(pooled) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                        sys.stdout.flush()
+                        with ProcessPoolExecutor(max_workers=min(len(pooled), os.cpu_count() or 1),
+                                                 mp_context=multiprocessing.get_context('fork')) as ex:
+                            futs = {name: ex.submit(_run_self_test, name) for name in pooled}
+                        for name, fut in futs.items():
+                            code_by_name[name] = fut.result()
+                except (ImportError, OSError):
+                    code_by_name = {}
+                for name in order:
+                    if name not in code_by_name:
+                        code_by_name[name] = _run_self_test(name)
+                results = [(name, code_by_name[name]) for name in order]
+                codes = [code for _, code in results]
 
                 # Write results summary to docs
 
                 try:
 
-                    out_dir = os.path.join(SCRIPT_DIR, 'docs')
-
-                    os.makedirs(out_dir, exist_ok=True)
-
-                    path = os.path.join(out_dir, 'selftest_last.txt')
-
-                    with open(path, 'w', encoding='utf-8') as f:
+                    ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-                        ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    worst = max(codes) if codes else 3
 
-                        f.write(f"Self-test run: {ts}\n")
+                    # Build the whole summary first, then write it in one call
 
-                        for name, code in results:
+                    parts = [f"Self-test run: {ts}"]
 
-                            status = 'PASS' if code == 0 else ('WARN' if code == 1 else ('FAIL' if code == 2 else 'EXC'))
+                    parts.extend(f"{name}: {SELFTEST_STATUS.get(code, 'EXC')} (code={code})" for name, code in results)
 
-                            f.write(f"{name}: {status} (code={code})\n")
+                    parts.append(f"OVERALL: {SELFTEST_STATUS.get(worst, 'EXC')} (worst={worst})")
 
-                        worst = max(codes) if codes else 3
+                    os.makedirs(DOCS_DIR, exist_ok=True)
 
-                        overall = 'PASS' if worst == 0 else ('WARN' if worst == 1 else ('FAIL' if worst == 2 else 'EXC'))
+                    with open(SELFTEST_LAST_PATH, 'w', encoding='utf-8') as f:
 
-                        f.write(f"OVERALL: {overall} (worst={worst})\n")
+                        f.write("\n".join(parts) + "\n")
 
                 except Exception:
 
@@ -12544,17 +12761,13 @@ if __name__ == "__main__":
 
                 try:
 
-                    out_dir = os.path.join(SCRIPT_DIR, 'docs')
-
-                    os.makedirs(out_dir, exist_ok=True)
+                    os.makedirs(DOCS_DIR, exist_ok=True)
 
-                    path = os.path.join(out_dir, 'selftest_last.txt')
-
-                    with open(path, 'w', encoding='utf-8') as f:
+                    with open(SELFTEST_LAST_PATH, 'w', encoding='utf-8') as f:
 
                         ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-                        status = 'PASS' if rc == 0 else ('WARN' if rc == 1 else ('FAIL' if rc == 2 else 'EXC'))
+                        status = SELFTEST_STATUS.get(rc, 'EXC')
 
                         f.write(f"Self-test run: {ts}\n{selector}: {status} (code={rc})\nOVERALL: {status} (worst={rc})\n")
 
@@ -12582,9 +12795,7 @@ if __name__ == "__main__":
 
         try:
 
-            # Attempt relative import first when launched from repo root
-
-            sys.path.append(os.path.join(SCRIPT_DIR, 'tools'))
+            # tools/ is on sys.path (see TOOLS_DIR); fall back to the package path below
 
             from export_rules import main as export_rules_main  # type: ignore
 
@@ -12670,89 +12881,114 @@ except Exception:
 
 # --- Mapping between 14-14 (center 8-8) and python-chess squares ---
 
-def _rc_to_sq(r: int, c: int):
+# Built once: file a..h = c - CH_MIN, rank 1..8 = CH_MAX - r; both empty without python-chess
 
-    if not (CH_MIN <= r <= CH_MAX and CH_MIN <= c <= CH_MAX) or not _CHESS_OK:
+_RC2SQ = {}
 
-        return None
+_SQ2RC = {}
 
-    file_idx = c - CH_MIN                   # a..h  0..7
+if _CHESS_OK:
 
-    rank_idx = CH_MAX - r                   # rank 1..8  0..7
+    for _r in range(CH_MIN, CH_MAX + 1):
 
-    try:
+        for _c in range(CH_MIN, CH_MAX + 1):
 
-        return chess.square(file_idx, rank_idx)
+            _RC2SQ[(_r, _c)] = chess.square(_c - CH_MIN, CH_MAX - _r)
 
-    except Exception:
+            _SQ2RC[_RC2SQ[(_r, _c)]] = (_r, _c)
 
-        return None
+    del _r, _c
 
+# Golden kind -> python-chess piece type, and one shared chess.Piece per (kind, is_white)
 
+_KIND_TO_CHESS = ({'K': chess.KING, 'Q': chess.QUEEN, 'R': chess.ROOK,
+                   'B': chess.BISHOP, 'N': chess.KNIGHT, 'P': chess.PAWN} if _CHESS_OK else {})
 
-def _sq_to_rc(sq: int):
+_CHESS_PIECES = {(kind, white): chess.Piece(typ, white)
+                 for kind, typ in _KIND_TO_CHESS.items() for white in (True, False)}
 
-    if not _CHESS_OK:
+# Parsed once; every duel start copies it instead of re-reading the FEN
 
-        return None
+_DUEL_START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
-    try:
+_DUEL_TEMPLATE_BOARD = chess.Board(_DUEL_START_FEN) if _CHESS_OK else None
 
-        f = chess.square_file(sq)
+# Rook (from_r, from_c, to_r, to_c) mirrored after an engine castle, by (king colour, 'K'ingside/'Q'ueenside)
 
-        rnk = chess.square_rank(sq)
+_CASTLE_ROOK_MOVES = {
 
-        r = CH_MAX - rnk
+    (PColor.WHITE, 'K'): (CH_MAX, CH_MIN + 7, CH_MAX, CH_MIN + 5),  # h1->f1
 
-        c = CH_MIN + f
+    (PColor.WHITE, 'Q'): (CH_MAX, CH_MIN + 0, CH_MAX, CH_MIN + 3),  # a1->d1
 
-        return (r, c)
+    (PColor.BLACK, 'K'): (CH_MIN, CH_MIN + 7, CH_MIN, CH_MIN + 5),  # h8->f8
+
+    (PColor.BLACK, 'Q'): (CH_MIN, CH_MIN + 0, CH_MIN, CH_MIN + 3),  # a8->d8
+
+}
+
+
+
+def _rc_to_sq(r: int, c: int):
 
-    except Exception:
+    return _RC2SQ.get((r, c))
 
-        return None
 
 
+def _sq_to_rc(sq: int):
 
-def _setup_chess_board_from_golden(bd: Board, state: GameState):
+    return _SQ2RC.get(sq)
 
-    if not _CHESS_OK:
 
-        return None
 
-    try:
+# Engine legal moves per position, bucketed by from-square as Golden (sr, sc, er, ec) tuples.
+# Keyed on python-chess's repetition key (placement, turn, castling, ep), which fixes legality.
+_engine_moves_cache = {}
+_ENGINE_MOVES_CACHE_MAX = 256
 
-        CB = chess.Board(None)  # empty
 
-        # Pieces
 
-        for rr in range(CH_MIN, CH_MAX+1):
+def _engine_moves_by_from(CB) -> Dict[int, tuple]:
+    """Generate CB.legal_moves once per position and index them by from-square."""
+    key = CB._transposition_key()
+    hit = _engine_moves_cache.get(key)
+    if hit is None:
+        buckets = {}
+        for mv in CB.legal_moves:
+            src = _sq_to_rc(mv.from_square)
+            dst = _sq_to_rc(mv.to_square)
+            if src is None or dst is None:
+                continue
+            buckets.setdefault(mv.from_square, []).append((src[0], src[1], dst[0], dst[1]))
+        hit = {sq: tuple(ms) for sq, ms in buckets.items()}
+        if len(_engine_moves_cache) >= _ENGINE_MOVES_CACHE_MAX:
+            _engine_moves_cache.clear()
+        _engine_moves_cache[key] = hit
+    return hit
 
-            for cc in range(CH_MIN, CH_MAX+1):
 
-                p = bd.get(rr, cc)
 
-                if not p: continue
+def _chess_board_from_golden(bd: Board, state: GameState):
 
-                if p.color not in (PColor.WHITE, PColor.BLACK):
+    try:
 
-                    continue
+        CB = chess.Board(None)  # empty
 
-                sq = _rc_to_sq(rr, cc)
+        # Pieces: only the occupied White/Black squares inside the 8-8
 
-                if sq is None: continue
+        for rr, cc in bb_squares((bd.bb[PColor.WHITE] | bd.bb[PColor.BLACK]) & INSIDE_MASK):
 
-                typ = {
+            p = bd.grid[rr][cc]
 
-                    'K': chess.KING, 'Q': chess.QUEEN, 'R': chess.ROOK,
+            sq = _rc_to_sq(rr, cc)
 
-                    'B': chess.BISHOP, 'N': chess.KNIGHT, 'P': chess.PAWN
+            if sq is None: continue
 
-                }.get(p.kind)
+            piece = _CHESS_PIECES.get((p.kind, p.color == PColor.WHITE))
 
-                if typ is None: continue
+            if piece is None: continue
 
-                CB.set_piece_at(sq, chess.Piece(typ, p.color == PColor.WHITE))
+            CB.set_piece_at(sq, piece)
 
         # Whose turn
 
@@ -12770,23 +13006,23 @@ def _setup_chess_board_from_golden(bd: Board, state: GameState):
 
         try:
 
-            if CB.piece_at(chess.E1) == chess.Piece(chess.KING, chess.WHITE):
+            if CB.piece_at(chess.E1) == _CHESS_PIECES[('K', True)]:
 
-                if CB.piece_at(chess.H1) == chess.Piece(chess.ROOK, chess.WHITE):
+                if CB.piece_at(chess.H1) == _CHESS_PIECES[('R', True)]:
 
                     rights += "K"
 
-                if CB.piece_at(chess.A1) == chess.Piece(chess.ROOK, chess.WHITE):
+                if CB.piece_at(chess.A1) == _CHESS_PIECES[('R', True)]:
 
                     rights += "Q"
 
-            if CB.piece_at(chess.E8) == chess.Piece(chess.KING, chess.BLACK):
+            if CB.piece_at(chess.E8) == _CHESS_PIECES[('K', False)]:
 
-                if CB.piece_at(chess.H8) == chess.Piece(chess.ROOK, chess.BLACK):
+                if CB.piece_at(chess.H8) == _CHESS_PIECES[('R', False)]:
 
                     rights += "k"
 
-                if CB.piece_at(chess.A8) == chess.Piece(chess.ROOK, chess.BLACK):
+                if CB.piece_at(chess.A8) == _CHESS_PIECES[('R', False)]:
 
                     rights += "q"
 
@@ -12838,129 +13074,144 @@ def _setup_chess_board_from_golden(bd: Board, state: GameState):
 
 
 
-def _alive_effective(bd: Board, state: GameState) -> List[PColor]:
+def _no_engine_board(bd: Board, state: GameState):
 
-    alive = bd.alive_colors()
+    """Stand-in for _setup_chess_board_from_golden when python-chess is missing: there is no engine board."""
 
-    flashing = getattr(state, "elim_flash_color", None)
+    return None
 
-    return [c for c in alive if c != flashing]
 
 
+# Without python-chess there is no engine board to build; pick the builder once instead of checking per call
 
-def _alive_by_kings(bd: Board) -> List[PColor]:
+_setup_chess_board_from_golden = _chess_board_from_golden if _CHESS_OK else _no_engine_board
 
-    """Return colors that currently have a King on the board anywhere."""
 
-    out: List[PColor] = []
 
-    for col in (PColor.WHITE, PColor.GREY, PColor.BLACK, PColor.PINK):
+def _apply_state_flags(state: GameState, **flags) -> None:
 
-        kp = bd.find_king(col)
+    """Set a batch of duel/pause bookkeeping attributes on state under a single try."""
 
-        if kp:
+    try:
 
-            out.append(col)
+        for attr, val in flags.items():
 
-    return out
+            setattr(state, attr, val)
 
+    except Exception:
 
+        pass
 
-def _in8(r, c): return CH_MIN <= r <= CH_MAX and CH_MIN <= c <= CH_MAX
 
 
+def _alive_effective(bd: Board, state: GameState) -> List[PColor]:
 
-def _king_in_home_corner(bd: Board, color: PColor) -> bool:
+    # Filter the board's alive-king set directly; no intermediate alive_colors() list
 
-    kp = bd.find_king(color)
+    alive = bd._alive
 
-    if not kp: return False
+    flashing = getattr(state, "elim_flash_color", None)
 
-    return tuple(kp) in set(king_home_cells(color)) and not _in8(*kp)
+    return [c for c in TURN_ORDER if c in alive and c != flashing]
 
 
 
-def _resolve_duel_seats(color_a: PColor, color_b: PColor) -> Tuple[Dict[PColor, PColor], PColor, PColor]:
+def _alive_by_kings(bd: Board) -> List[PColor]:
 
-    finalists = [color_a, color_b]
+    """Return colors that currently have a King on the board anywhere."""
 
-    pair = set(finalists)
+    # Board.set keeps the alive-king set exact, so no per-colour king lookup is needed
 
-    white_origin = None
+    return bd.alive_colors()
 
-    black_origin = None
 
-    if PColor.WHITE in pair:
 
-        white_origin = PColor.WHITE
+def _in8(r, c): return _IN_CHESS_LUT[r * BOARD_SIZE + c]
 
-        other = finalists[0] if finalists[1] == PColor.WHITE else finalists[1]
 
-        if other == PColor.WHITE:
+def _king_entry_moves(r: int, c: int, base) -> List[Tuple[int, int, int, int]]:
 
-            other = finalists[0]
+    """Moves for a king outside the 8-8: those that strictly reduce its distance to the 8-8,
 
-        black_origin = other
+    or, if none do (blocked edge cases), those that keep it. One pass over _DIST_LUT."""
 
-    elif PColor.BLACK in pair:
+    dist = _DIST_LUT
 
-        black_origin = PColor.BLACK
+    cur = dist[r * BOARD_SIZE + c]
 
-        other = finalists[0] if finalists[1] == PColor.BLACK else finalists[1]
+    closer = []
 
-        if other == PColor.BLACK:
+    non_worse = []
 
-            other = finalists[0]
+    for er, ec in base:
 
-        white_origin = other
+        d = dist[er * BOARD_SIZE + ec]
 
-    else:
+        if d < cur:
 
-        if pair == {PColor.GREY, PColor.PINK}:
+            closer.append((r, c, er, ec))
 
-            white_origin = PColor.PINK
+        elif d == cur and not closer:
 
-            black_origin = PColor.GREY
+            non_worse.append((r, c, er, ec))
+
+    return closer or non_worse
 
-        else:
 
-            white_origin, black_origin = finalists[0], finalists[1]
 
+def _king_in_home_corner(bd: Board, color: PColor) -> bool:
 
+    kp = bd.find_king(color)
 
-    remap: Dict[PColor, PColor] = {}
+    if not kp: return False
 
-    if white_origin is not None:
+    # king_positions stores (r, c) tuples, so kp can be looked up as-is
 
-        remap[white_origin] = PColor.WHITE
+    return kp in _KING_HOME_CELLS[color] and not _IN_CHESS_LUT[kp[0] * BOARD_SIZE + kp[1]]
 
-    if black_origin is not None:
 
-        remap[black_origin] = PColor.BLACK
 
-    return remap, white_origin or PColor.WHITE, black_origin or PColor.BLACK
+# Duel seats per unordered finalist pair -> (white_origin, black_origin).
+# WHITE keeps the white seat, else BLACK keeps the black seat; GREY vs PINK seats PINK as white.
+_DUEL_SEAT_MAP: Dict[FrozenSet[PColor], Tuple[PColor, PColor]] = {
+    frozenset((PColor.WHITE, PColor.GREY)): (PColor.WHITE, PColor.GREY),
+    frozenset((PColor.WHITE, PColor.BLACK)): (PColor.WHITE, PColor.BLACK),
+    frozenset((PColor.WHITE, PColor.PINK)): (PColor.WHITE, PColor.PINK),
+    frozenset((PColor.GREY, PColor.BLACK)): (PColor.GREY, PColor.BLACK),
+    frozenset((PColor.PINK, PColor.BLACK)): (PColor.PINK, PColor.BLACK),
+    frozenset((PColor.GREY, PColor.PINK)): (PColor.PINK, PColor.GREY),
+}
 
 
+def _resolve_duel_seats(color_a: PColor, color_b: PColor) -> Tuple[Dict[PColor, PColor], PColor, PColor]:
 
-def _purge_outside_8x8(bd: Board):
+    white_origin, black_origin = _DUEL_SEAT_MAP.get(frozenset((color_a, color_b)), (color_a, color_b))
 
-    removed = 0
+    remap: Dict[PColor, PColor] = {white_origin: PColor.WHITE}
 
-    for rr in range(BOARD_SIZE):
+    remap[black_origin] = PColor.BLACK
 
-        for cc in range(BOARD_SIZE):
+    return remap, white_origin, black_origin
 
-            p = bd.get(rr, cc)
 
-            if p and not _in8(rr, cc) and p.kind != 'K':   # <-- spare kings
 
-                bd.set(rr, cc, None)
+def _purge_outside_8x8(bd: Board):
 
-                removed += 1
+    # Occupied squares outside the 8-8, sparing kings. This mask is the "dirty" test: in a
 
-    if removed:
+    # settled duel it is 0, so the per-turn re-purge ends here
 
-        print(f"[TP-Consolidated] Purged {removed} piece(s) outside 8-8.")
+    doomed = bd.outside_non_kings()
+
+    if not doomed:
+
+        return 0
+
+    removed = bin(doomed).count('1')
+
+    bd.clear_squares(doomed)
+
+    print(f"[TP-Consolidated] Purged {removed} piece(s) outside 8-8.")
 
     return removed
 
@@ -12986,23 +13237,9 @@ def _enter_duel_kqbb(bd: Board, state: GameState, white_name: str = "White", bla
 
     global AI_PLAYERS
 
-    # Clear entire 8x8 region first
-
-    for rr in range(CH_MIN, CH_MAX+1):
-
-        for cc in range(CH_MIN, CH_MAX+1):
+    # Clear the 8x8 region and the outside area completely (one reset of grid, indexes and hash)
 
-            bd.set(rr, cc, None)
-
-    # Clear outside area completely
-
-    for rr in range(BOARD_SIZE):
-
-        for cc in range(BOARD_SIZE):
-
-            if not _in8(rr, cc):
-
-                bd.set(rr, cc, None)
+    bd.reset_empty()
 
 
 
@@ -13111,29 +13348,9 @@ def _enter_duel_kqbb(bd: Board, state: GameState, white_name: str = "White", bla
 
         pass
 
-    # Duel starts in pure human-control mode; skip Ready gating.
-
-    try:
-
-        state.hold_at_start = False
-
-        state.waiting_ready = False
-
-    except Exception:
-
-        pass
-
-    # Hard stop the long game; switch to duel phase
-
-    try:
-
-        state.long_game_over = True
-
-        state.phase = 'duel'
-
-    except Exception:
+    # Duel starts in pure human-control mode; skip Ready gating. Hard stop the long game; switch to duel phase
 
-        pass
+    _apply_state_flags(state, hold_at_start=False, waiting_ready=False, long_game_over=True, phase='duel')
 
 
 
@@ -13145,7 +13362,7 @@ def _enter_duel_kqbb(bd: Board, state: GameState, white_name: str = "White", bla
 
         if hasattr(state, 'turn_i'):
 
-            state.turn_i = TURN_ORDER.index(PColor.WHITE)
+            state.turn_i = TURN_INDEX[PColor.WHITE]
 
         # Reset simple move counters/logs if present
 
@@ -13173,11 +13390,9 @@ def _enter_duel_kqbb(bd: Board, state: GameState, white_name: str = "White", bla
 
         try:
 
-            # Standard chess starting position with full castling rights.
-
-            fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+            # Standard chess starting position with full castling rights (no move stack to copy).
 
-            state.chess_board = chess.Board(fen)
+            state.chess_board = _DUEL_TEMPLATE_BOARD.copy(stack=False)
 
         except Exception:
 
@@ -13253,13 +13468,11 @@ def _enter_duel_kqbb(bd: Board, state: GameState, white_name: str = "White", bla
 
     try:
 
-        import pygame as _pg
-
         state.freeze_advance = True
 
         state.two_stage_pause = True
 
-        state._duel_delay_until = _pg.time.get_ticks() + 1200
+        state._duel_delay_until = pygame.time.get_ticks() + 1200
 
     except Exception:
 
@@ -13279,47 +13492,12 @@ def _force_duel_now(bd: Board, state: GameState) -> bool:
 
     try:
 
-        # Cancel any flashing/delay flags
-
-        for attr, val in (
-
-            ('_finalists_prep_started', False),
-
-            ('_flash_until', None),
-
-            ('_teleport_after', 0),
-
-            ('_duel_cleared_board', False),
-
-        ):
-
-            try:
-
-                setattr(state, attr, val)
-
-            except Exception:
-
-                pass
-
-        # For a forced duel, do not block with any inspection/duel delay
-
-        try:
-
-            state._duel_delay_until = 0
-
-        except Exception:
-
-            pass
-
-        state.two_stage_pause = False
-
-        state.freeze_advance = False
-
-        state.post_move_delay_until = 0
+        # Cancel any flashing/delay flags; for a forced duel, do not block with any inspection/duel delay
 
-        state.waiting_ready = False
-
-        state.hold_at_start = False
+        _apply_state_flags(state, _finalists_prep_started=False, _flash_until=None, _teleport_after=0,
+                           _duel_cleared_board=False, _duel_delay_until=0, two_stage_pause=False,
+                           freeze_advance=False, post_move_delay_until=0, waiting_ready=False,
+                           hold_at_start=False)
 
         # Choose display names if available
 
@@ -13357,14 +13535,8 @@ def _force_duel_now(bd: Board, state: GameState) -> bool:
         b_name = name_map.get(black_origin.name, black_origin.name.title())
         _enter_duel_kqbb(bd, state, w_name, b_name)
 
-        try:
-            state._duel_delay_until = 0
-            state.two_stage_pause = False
-            state.post_move_delay_until = 0
-            state.freeze_advance = False
-            state._duel_banner = "Forced: Duel (Chess) Now - White to move"
-        except Exception:
-            pass
+        _apply_state_flags(state, _duel_delay_until=0, two_stage_pause=False, post_move_delay_until=0,
+                           freeze_advance=False, _duel_banner="Forced: Duel (Chess) Now - White to move")
 
 
 
@@ -13434,9 +13606,7 @@ def _activate_two_player_if_needed(bd: Board, state: GameState):
 
         try:
 
-            import pygame as _pg
-
-            now_ticks = _pg.time.get_ticks()
+            now_ticks = pygame.time.get_ticks()
 
         except Exception:
 
@@ -13456,15 +13626,7 @@ def _activate_two_player_if_needed(bd: Board, state: GameState):
 
             # Ensure grace is fully off during duel prep so no 'checks deferred' occurs
 
-            try:
-
-                state.grace_active = False
-
-                state.grace_turns_remaining = 0
-
-            except Exception:
-
-                pass
+            _apply_state_flags(state, grace_active=False, grace_turns_remaining=0)
 
             state._flash_until = now_ticks + 3000
 
@@ -13482,13 +13644,7 @@ def _activate_two_player_if_needed(bd: Board, state: GameState):
 
             if not getattr(state, '_duel_cleared_board', False):
 
-                for rr in range(BOARD_SIZE):
-
-                    for cc in range(BOARD_SIZE):
-
-                        if bd.get(rr, cc) is not None:
-
-                            bd.set(rr, cc, None)
+                bd.reset_empty()
 
                 state._duel_cleared_board = True
 
@@ -13496,9 +13652,7 @@ def _activate_two_player_if_needed(bd: Board, state: GameState):
 
                 try:
 
-                    import pygame as _pg
-
-                    state._teleport_after = _pg.time.get_ticks() + 1000
+                    state._teleport_after = pygame.time.get_ticks() + 1000
 
                 except Exception:
 
@@ -13544,10 +13698,8 @@ def _activate_two_player_if_needed(bd: Board, state: GameState):
             state._duel_turn_reset = True
 
             # Clear flash flags
-            state._finalists_prep_started = False
-            state._flash_until = None
-            state._teleport_after = 0
-            state._duel_cleared_board = False
+            _apply_state_flags(state, _finalists_prep_started=False, _flash_until=None,
+                               _teleport_after=0, _duel_cleared_board=False)
 
             print(f"[DUEL] Teleported {white_origin.name} vs {black_origin.name} into standard chess duel. White starts.")
 
@@ -13619,25 +13771,7 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
             if p is not None and p.kind != 'K':
 
-                has_outside = False
-
-                for rr in range(BOARD_SIZE):
-
-                    for cc in range(BOARD_SIZE):
-
-                        q = board.get(rr, cc)
-
-                        if q and q.color == active_color and not _in8(rr, cc):
-
-                            has_outside = True
-
-                            break
-
-                    if has_outside:
-
-                        break
-
-                if has_outside:
+                if _has_piece_outside(board, active_color):
 
                     return []
 
@@ -13653,21 +13787,9 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
             try:
 
-                if p and p.kind == 'K' and not _in8(r, c):
-
-                    base = _ORIG_LEGAL(board, r, c, active_color)
+                if p and p.kind == 'K' and not _IN_CHESS_LUT[r * BOARD_SIZE + c]:
 
-                    cur = dist_to_chess(r, c)
-
-                    closer = [(r, c, er, ec) for (er, ec) in base if dist_to_chess(er, ec) < cur]
-
-                    if closer:
-
-                        return closer
-
-                    non_worse = [(r, c, er, ec) for (er, ec) in base if dist_to_chess(er, ec) == cur]
-
-                    return non_worse
+                    return _king_entry_moves(r, c, _ORIG_LEGAL(board, r, c, active_color))
 
             except Exception:
 
@@ -13675,37 +13797,23 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
             return []
 
-        # Only allow moves for the side to move
-
-        if (p.color == PColor.WHITE) != CB.turn:
-
-            return []
-
-        out = []
-
-        try:
-
-            for mv in CB.legal_moves:
+        # Only allow moves for the side to move (sq_from is a valid 0..63 square from here on,
 
-                if mv.from_square != sq_from:
+        # so the python-chess calls below cannot raise and need no try/except)
 
-                    continue
-
-                dst = _sq_to_rc(mv.to_square)
+        if p is None or (p.color == PColor.WHITE) != CB.turn:
 
-                if dst is None:
-
-                    continue
+            return []
 
-                er, ec = dst
+        # A piece other than a pawn or king can only move onto squares it attacks that are not
 
-                out.append((r, c, er, ec))
+        # held by its own side; if there are none it is silent, so skip the engine move list
 
-        except Exception:
+        if p.kind not in ('P', 'K') and not (CB.attacks_mask(sq_from) & ~CB.occupied_co[CB.turn]):
 
             return []
 
-        return out
+        return list(_engine_moves_by_from(CB).get(sq_from, ()))
 
 
 
@@ -13729,23 +13837,13 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
     # pieces have entered. This enforces priority for entering the 8-8.
 
-    def _color_has_piece_outside(bd: Board, col: PColor) -> bool:
-
-        for rr in range(BOARD_SIZE):
-
-            for cc in range(BOARD_SIZE):
-
-                q = bd.get(rr, cc)
+    color_has_outside = _has_piece_outside(board, active_color)
 
-                if q and q.color == col and not _in8(rr, cc):
+    # Square-indexed 8-8 table bound locally: the filters below index it instead of calling _in8 per move
 
-                    return True
-
-        return False
-
-    color_has_outside = _color_has_piece_outside(board, active_color)
+    in8 = _IN_CHESS_LUT
 
-    if color_has_outside and _in8(r, c):
+    if color_has_outside and in8[r * BOARD_SIZE + c]:
 
         # Inside pieces are frozen until all own pieces are inside.
 
@@ -13755,39 +13853,35 @@ def legal_moves_for_piece(board: Board, r: int, c: int, active_color: Optional[P
 
     if p.kind != 'K':
 
-        return [(r, c, er, ec) for (er,ec) in base if _in8(er,ec)]
+        return [(r, c, er, ec) for (er,ec) in base if in8[er * BOARD_SIZE + ec]]
 
     # Kings: If outside 8-8, must move toward/into 8-8 ASAP (no stalling)
 
-    if not _in8(r, c):
-
-        cur = dist_to_chess(r, c)
-
-        # Prefer moves that strictly reduce distance
-
-        closer = [(r, c, er, ec) for (er,ec) in base if dist_to_chess(er,ec) < cur]
-
-        if closer:
+    if not in8[r * BOARD_SIZE + c]:
 
-            return closer
+        return _king_entry_moves(r, c, base)
 
-        # If no strictly-closer move exists (blocked edge cases), allow non-worsening
+    # Once in 8-8, must stay in 8-8
 
-        non_worse = [(r, c, er, ec) for (er,ec) in base if dist_to_chess(er,ec) == cur]
+    return [(r, c, er, ec) for (er,ec) in base if in8[er * BOARD_SIZE + ec]]
 
-        return non_worse
 
-    # Once in 8-8, must stay in 8-8
 
-    return [(r, c, er, ec) for (er,ec) in base if _in8(er,ec)]
+def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
+    # Search probes never touch the engine board or the two-player activation, and the base
+    # move applies the same corner checks; hand them straight through
 
+    if simulate:
 
-def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
+        return _ORIG_DO(board, sr, sc, er, ec, True)
 
     if is_corner_square(sr, sc):
+
         if simulate:
+
             return None, False, None, {}
+
         raise ValueError("Illegal move from blocked corner square")
 
     if is_corner_square(er, ec):
@@ -13843,15 +13937,11 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
         try:
 
-            if p.kind == 'P':
-
-                # Promotion rank for side to move is python-chess rank 7 for the move (to_square rank in {0,7})
+            # Golden rows CH_MIN/CH_MAX are python-chess ranks 7/0, so the destination row decides promotion
 
-                to_rank = chess.square_rank(sq_to)
+            if p.kind == 'P' and (er == CH_MIN or er == CH_MAX):
 
-                if to_rank in (0, 7):
-
-                    promo = chess.QUEEN
+                promo = chess.QUEEN
 
             mv = chess.Move(sq_from, sq_to, promotion=promo)
 
@@ -13895,45 +13985,25 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
             # Mirror castling rook move
 
-            if is_castle:
-
-                try:
-
-                    # Determine side (kingside if moved right)
-
-                    if ec - sc == 2:  # kingside
-
-                        if p.color == PColor.WHITE:
-
-                            r_sr, r_sc, r_er, r_ec = CH_MAX, CH_MIN+7, CH_MAX, CH_MIN+5  # h1->f1
-
-                        else:
-
-                            r_sr, r_sc, r_er, r_ec = CH_MIN, CH_MIN+7, CH_MIN, CH_MIN+5  # h8->f8
-
-                    else:  # queenside
-
-                        if p.color == PColor.WHITE:
+            # Kingside if the king moved right; only WHITE/BLACK kings have an entry
 
-                            r_sr, r_sc, r_er, r_ec = CH_MAX, CH_MIN+0, CH_MAX, CH_MIN+3  # a1->d1
+            rook_move = _CASTLE_ROOK_MOVES.get((p.color, 'K' if ec > sc else 'Q')) if is_castle else None
 
-                        else:
-
-                            r_sr, r_sc, r_er, r_ec = CH_MIN, CH_MIN+0, CH_MIN, CH_MIN+3  # a8->d8
+            if rook_move is not None:
 
-                    rook = board.get(r_sr, r_sc)
+                r_sr, r_sc, r_er, r_ec = rook_move
 
-                    if rook and rook.kind == 'R':
+                rook = board.get(r_sr, r_sc)
 
-                        board.set(r_sr, r_sc, None)
+                if rook and rook.kind == 'R':
 
-                        board.set(r_er, r_ec, rook)
+                    board.set(r_sr, r_sc, None)
 
-                        rook.has_moved = True
+                    board.set(r_er, r_ec, rook)
 
-                except Exception:
+                    rook.has_moved = True
 
-                    pass
+                    board.refresh_square(r_er, r_ec)
 
             # Promotion already handled by original code (auto-queen). Ensure effect flag if python-chess promoted
 
@@ -13947,18 +14017,6 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
                 pass
 
-            # Attach SAN if desired
-
-            try:
-
-                last = CB.peek()
-
-                effects['san'] = CB.san(last)
-
-            except Exception:
-
-                pass
-
             # Reactivate two-player safety and return
 
             try:
@@ -13997,6 +14055,36 @@ def board_do_move(board: Board, sr, sc, er, ec, simulate=False):
 
 
 
+# a1..h8 overlay as ready-made (surface, pos) blit pairs, shadow first; keyed by (SQUARE, font size)
+_coord_label_cache = {}
+
+# Label colour by square parity: grey on light squares, near-white on dark ones
+_LABEL_COLS = ((150,150,150), (235,235,235))
+
+# "a8".."h1" by (row, col) within the 8x8, top row first
+_SQUARE_LABELS = tuple(tuple(f"{'abcdefgh'[c]}{8-r}" for c in range(8)) for r in range(8))
+
+
+def _coord_label_blits(fnt, fsize: int) -> list:
+    key = (SQUARE, fsize)
+    blits = _coord_label_cache.get(key)
+    if blits is None:
+        blits = []
+        y_off = SQUARE - fnt.get_height() - 2
+        for rr in range(8):
+            for cc in range(8):
+                label = _SQUARE_LABELS[rr][cc]
+                x = (CH_MIN+cc) * SQUARE + 3
+                y = (CH_MIN+rr) * SQUARE + y_off
+                col = _LABEL_COLS[(rr + cc) & 1]
+                blits.append((render_text(fnt, label, (0,0,0)), (x+1, y+1)))
+                blits.append((render_text(fnt, label, col), (x, y)))
+        _coord_label_cache.clear()  # SQUARE changed (window resize): drop the old layout
+        _coord_label_cache[key] = blits
+    return blits
+
+
+
 def draw_board(screen, board: Board, *args, **kwargs):
 
     # Ensure two-player activation/passive purge before each frame draw
@@ -14007,7 +14095,7 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
         # Safety purge each frame in two-player mode to remove any lingering non-king pieces outside 8-8
 
-        if getattr(gs, 'two_stage_active', False) and DUEL_TELEPORT_ON_TWO:
+        if gs.two_stage_active and DUEL_TELEPORT_ON_TWO:
 
             _purge_outside_8x8(board)
 
@@ -14015,11 +14103,9 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
         try:
 
-            import pygame as _pg
-
-            if getattr(gs, '_duel_delay_until', None) is not None:
+            if gs._duel_delay_until is not None:
 
-                if _pg.time.get_ticks() >= gs._duel_delay_until:
+                if pygame.time.get_ticks() >= gs._duel_delay_until:
 
                     gs._duel_delay_until = None
 
@@ -14041,59 +14127,35 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
     res = _ORIG_DRAW(screen, board, *args, **kwargs)
 
-    # During chess lock, do NOT replace Golden board visuals; optionally add coordinates overlay on the inside 8-8
-
-    try:
-
-        if getattr(gs, 'chess_lock', False) and bool(UI_STATE.get('show_coords', False)):
-
-            # Per-square coordinate labels at bottom-left of each 8x8 square (a1..h8)
-
-            try:
-
-                fsize = max(12, SQUARE // 6)
-
-                fnt = get_sidebar_font(fsize, False)
-
-            except Exception:
-
-                fnt = None
-
-            if fnt:
-
-                files = "abcdefgh"
+    # The overlays below are deliberately not wrapped in screen.lock(): they are batched blits plus a
 
-                for rr in range(8):
+    # few banner rects, and pygame refuses to blit onto a locked surface (the software display surface
 
-                    for cc in range(8):
+    # reports mustlock() False anyway, so there is no per-call lock cost to save)
 
-                        label = f"{files[cc]}{8-rr}"
+    # Non-king pieces outside the 8-8 as one mask; with it 0 and no lock/flash/duel state there is
 
-                        x = (CH_MIN+cc) * SQUARE + 3
+    # nothing to overlay, so the usual frame returns here
 
-                        y = (CH_MIN+rr) * SQUARE + (SQUARE - fnt.get_height() - 2)
+    stray = board.outside_non_kings()
 
-                        # Lighter labels with parity-aware contrast to remain readable
+    if not (stray or gs._finalists_prep_started or gs._duel_started or gs.chess_lock):
 
-                        is_light = ((rr + cc) % 2 == 0)
+        return res
 
-                        col = (150,150,150) if is_light else (235,235,235)
-
-                        # Optional subtle shadow for readability
-
-                        try:
+    # During chess lock, do NOT replace Golden board visuals; optionally add coordinates overlay on the inside 8-8
 
-                            sh = fnt.render(label, True, (0,0,0))
+    try:
 
-                            screen.blit(sh, (x+1, y+1))
+        if gs.chess_lock and bool(UI_STATE.get('show_coords', False)):
 
-                        except Exception:
+            # Per-square coordinate labels at bottom-left of each 8x8 square (a1..h8); shadowed labels are
 
-                            pass
+            # rendered once per layout and go out in one batched blit (the section's try covers failures)
 
-                        lab = fnt.render(label, True, col)
+            fsize = max(12, SQUARE // 6)
 
-                        screen.blit(lab, (x, y))
+            _blit_batch(screen, _coord_label_blits(get_sidebar_font(fsize, False), fsize))
 
     except Exception:
 
@@ -14109,35 +14171,39 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
     try:
 
-        if getattr(gs, '_finalists_prep_started', False) and getattr(gs, '_flash_until', None):
+        if gs._finalists_prep_started and gs._flash_until:
 
-            import pygame as _pg
+            UI_STATE['animating'] = True
 
-            now = _pg.time.get_ticks()
+            now = pygame.time.get_ticks()
 
-            remain = max(0, getattr(gs, '_flash_until', 0) - now)
+            remain = max(0, gs._flash_until - now)
 
-            # Banner at bottom indicating upcoming duel and countdown
+            whoA = gs._finalists_a
 
-            try:
+            whoB = gs._finalists_b
 
-                banner_font = pygame.font.SysFont("Arial", 20, bold=True)
+            # Banner at bottom indicating upcoming duel and countdown
 
-                whoA = getattr(gs, '_finalists_a', None)
+            try:
 
-                whoB = getattr(gs, '_finalists_b', None)
+                banner_font = get_sidebar_font(20, True)
 
                 names = f"{whoA.name if whoA else '?'} vs {whoB.name if whoB else '?'}"
 
                 msg = f"Duel incoming: {names}  teleport in {int((remain/1000)+0.5)}s"
 
-                bar = pygame.Rect(0, BOARD_SIZE*SQUARE, LOGICAL_W, 44)
+                bar = _banner_rect()
 
                 pygame.draw.rect(screen, BANNER_OK, bar)
 
                 clr = (240,240,210)
 
-                screen.blit(banner_font.render(msg, True, clr), (10, BOARD_SIZE*SQUARE + 8))
+                # msg only changes when the rounded countdown ticks, so render_text's (font, msg, clr)
+
+                # cache rasterises it about once a second rather than every frame
+
+                screen.blit(render_text(banner_font, msg, clr), (10, BOARD_SIZE*SQUARE + 8))
 
             except Exception:
 
@@ -14151,25 +14217,19 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
                 col = (255, 215, 0)
 
-                for rr in range(BOARD_SIZE):
-
-                    for cc in range(BOARD_SIZE):
-
-                        p = board.get(rr, cc)
-
-                        if not p:
+                # Finalists' squares straight from their occupancy bitboards (no grid scan per frame)
 
-                            continue
+                flash_bits = 0
 
-                        if p.color in (getattr(gs, '_finalists_a', None), getattr(gs, '_finalists_b', None)):
+                for who in (whoA, whoB):
 
-                            try:
+                    flash_bits |= board.bb.get(who, 0)
 
-                                pygame.draw.rect(screen, col, (cc*SQUARE+2, rr*SQUARE+2, SQUARE-4, SQUARE-4), 3)
+                inset = _square_inset_rects()
 
-                            except Exception:
+                outline = _square_outline(col, 3)
 
-                                pass
+                _blit_batch(screen, [(outline, inset[rr][cc][:2]) for rr, cc in bb_squares(flash_bits)])
 
     except Exception:
 
@@ -14179,19 +14239,19 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
     try:
 
-        if getattr(gs, '_duel_started', False):
+        if gs._duel_started:
 
-            banner = getattr(gs, '_duel_banner', None)
+            banner = gs._duel_banner
 
             if banner:
 
-                bar = pygame.Rect(0, BOARD_SIZE*SQUARE, LOGICAL_W, 44)
+                bar = _banner_rect()
 
                 pygame.draw.rect(screen, BANNER_OK, bar)
 
-                status_font = pygame.font.SysFont("Arial", 20, bold=True)
+                status_font = get_sidebar_font(20, True)
 
-                txt = status_font.render(banner, True, (235,235,210))
+                txt = render_text(status_font, banner, (235,235,210))
 
                 screen.blit(txt, (10, BOARD_SIZE*SQUARE + 8))
 
@@ -14203,51 +14263,27 @@ def draw_board(screen, board: Board, *args, **kwargs):
 
     try:
 
-        outside: list = []
-
-        for rr in range(BOARD_SIZE):
-
-            for cc in range(BOARD_SIZE):
-
-                p = board.get(rr, cc)
-
-                if p and p.kind != 'K' and not _in8(rr, cc):
-
-                    outside.append((rr, cc, p))
+        if stray:
 
-        if outside:
+            outside = list(bb_squares(stray))  # row-major, as a grid scan would list them
 
             # Gray outline if not in two-player yet; Red warning if two-player active (should be none)
 
-            two = bool(getattr(gs, 'two_stage_active', False))
+            two = bool(gs.two_stage_active)
 
             color = (220, 60, 60) if two else (150, 150, 150)
 
-            for (rr, cc, p) in outside:
-
-                try:
-
-                    pygame.draw.rect(
-
-                        screen,
-
-                        color,
-
-                        (cc * SQUARE + 2, rr * SQUARE + 2, SQUARE - 4, SQUARE - 4),
+            inset = _square_inset_rects()
 
-                        2
+            outline = _square_outline(color, 2)
 
-                    )
-
-                except Exception:
-
-                    pass
+            _blit_batch(screen, [(outline, inset[rr][cc][:2]) for (rr, cc) in outside])
 
             if two:
 
                 try:
 
-                    locs = ', '.join([f"{rc_to_label(r,c)}:{getattr(p,'kind','?')}" for (r,c,p) in outside])
+                    locs = ', '.join([f"{rc_to_label(r,c)}:{getattr(board.grid[r][c],'kind','?')}" for (r,c) in outside])
 
                     print(f"[WARN] Two-player active but found non-king(s) outside 8-8: {locs}")
 
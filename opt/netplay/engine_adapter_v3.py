@@ -68,10 +68,24 @@ def _piece_value(kind: str) -> int:
     return int(DEFAULT_PIECE_VALUES.get(kind, 0))
 
 
+# Serialized board cells, one shared dict per (kind, colour name). Every poll rebuilt the same few
+# dozen {"kind", "color"} dicts; callers only read them (the server deep-copies boards it keeps).
+_PIECE_CELLS: Dict[Tuple[str, str], Dict[str, str]] = {}
+
+
+def _piece_cell(kind: str, color_name: str) -> Dict[str, str]:
+    cell = _PIECE_CELLS.get((kind, color_name))
+    if cell is None:
+        cell = _PIECE_CELLS[(kind, color_name)] = {"kind": kind, "color": color_name}
+    return cell
+
+
 def _refresh_engine_bindings() -> None:
-    global PColor, Board
+    global PColor, Board, TURN_IDX
     PColor = getattr(engine, "PColor", None)
     Board = getattr(engine, "Board", None)
+    # Seat -> position in engine.TURN_ORDER, so per-move turn bookkeeping avoids list.index scans
+    TURN_IDX = {col: i for i, col in enumerate(getattr(engine, "TURN_ORDER", ()))}
     if PColor is None or Board is None:
         raise RuntimeError("Loaded engine module is missing PColor/Board definitions required by netplay.")
 
@@ -161,6 +175,9 @@ class GoldenHeadlessEngine:
         self._duel_ready_time: float = 0.0
         self._duel_chess: Optional['chess.Board'] = None
         self._duel_winner: Optional[Any] = None
+        # legal_moves_for_active results for the current position: key -> (moves, frozenset(moves));
+        # cleared whenever apply_move/duel seeding/elimination change the game
+        self._lm_cache: Dict[tuple, Tuple[Tuple[Tuple[int, int, int, int], ...], frozenset]] = {}
     def _duel_active(self) -> bool:
         return self._duel_chess is not None
 
@@ -185,11 +202,9 @@ class GoldenHeadlessEngine:
     def _sync_duel_board(self) -> None:
         if not self._duel_active():
             return
-        for r in range(engine.BOARD_SIZE):
-            for c in range(engine.BOARD_SIZE):
-                piece = self.board.get(r, c)
-                if piece and piece.color in (engine.PColor.WHITE, engine.PColor.BLACK):
-                    self.board.set(r, c, None)
+        for col in (engine.PColor.WHITE, engine.PColor.BLACK):
+            for r, c in self._squares_of(col):
+                self.board.set(r, c, None)
         if self._duel_chess is None:
             return
         for square in chess.SQUARES:
@@ -200,6 +215,23 @@ class GoldenHeadlessEngine:
         self._duel_active_last: bool = False
 
     # ---- Helpers ----
+    def _squares_of(self, color: Any) -> List[Tuple[int, int]]:
+        """(r, c) of every piece of `color`, row-major.
+
+        Reads the engine Board's per-colour occupancy bitboard when it keeps one (so the cost follows the
+        piece count, not BOARD_SIZE**2); older engine builds without bitboards get a grid scan.
+        """
+        bb = getattr(self.board, 'bb', None)
+        if bb is not None and hasattr(engine, 'bb_squares'):
+            return list(engine.bb_squares(bb.get(color, 0)))
+        out: List[Tuple[int, int]] = []
+        for r in range(engine.BOARD_SIZE):
+            for c in range(engine.BOARD_SIZE):
+                p = self.board.get(r, c)
+                if p is not None and p.color == color:
+                    out.append((r, c))
+        return out
+
     def _ensure_alive_active(self) -> Any:
         """Return an alive color to move; skip eliminated colors and normalize pointers."""
         try:
@@ -212,7 +244,7 @@ class GoldenHeadlessEngine:
                 return act
             # Advance to next alive color clockwise
             try:
-                idx = engine.TURN_ORDER.index(act)
+                idx = TURN_IDX[act]
             except Exception:
                 idx = 0
             for i in range(1, 5):
@@ -220,7 +252,7 @@ class GoldenHeadlessEngine:
                 if cand in alive:
                     # Keep baseline turn_i aligned with this alive color
                     try:
-                        self.turn_i = engine.TURN_ORDER.index(cand)
+                        self.turn_i = TURN_IDX[cand]
                     except Exception:
                         pass
                     return cand
@@ -263,31 +295,30 @@ class GoldenHeadlessEngine:
                 r = 9 - rank
                 c = 2 + file
                 color = engine.PColor.WHITE if piece.color else engine.PColor.BLACK
-                grid[r][c] = {"kind": piece.symbol().upper(), "color": color.name}
+                grid[r][c] = _piece_cell(piece.symbol().upper(), color.name)
             return grid
-        grid: List[List[Optional[Dict[str, str]]]] = []
-        for r in range(engine.BOARD_SIZE):
-            row: List[Optional[Dict[str, str]]] = []
-            for c in range(engine.BOARD_SIZE):
-                p = self.board.get(r, c)
-                if p is None:
-                    row.append(None)
-                else:
-                    row.append({"kind": p.kind, "color": p.color.name})
-            grid.append(row)
+        # Empty grid, then fill only the occupied squares colour by colour
+        size = engine.BOARD_SIZE
+        grid = [[None] * size for _ in range(size)]
+        for col in engine.PColor:
+            name = col.name
+            for r, c in self._squares_of(col):
+                grid[r][c] = _piece_cell(self.board.get(r, c).kind, name)
         return grid
 
     def serialize_state(self) -> Dict[str, Any]:
+        turn = self.active_color()  # may normalise turn_i/forced_turn, so resolve it before reading alive
+        alive = self.alive_colors()
         out: Dict[str, Any] = {
-            "turn": self.active_color().name,
+            "turn": turn.name,
             "board": self.serialize_board(),
-            "alive": [c.name for c in self.alive_colors()],
+            "alive": [c.name for c in alive],
             "moves": list(self.moves_list),
         }
         try:
             in_check: List[str] = []
             if not self.chess_mode and hasattr(engine, "king_in_check"):
-                for col in self.alive_colors():
+                for col in alive:
                     try:
                         if engine.king_in_check(self.board, col):
                             in_check.append(col.name)
@@ -391,38 +422,69 @@ class GoldenHeadlessEngine:
             return []
         kr, kc = king_pos
         try:
-            for rr in range(engine.BOARD_SIZE):
-                for cc in range(engine.BOARD_SIZE):
-                    piece = self.board.get(rr, cc)
-                    if piece and getattr(piece, 'color', None) == color and piece.kind == 'Q':
-                        return [(rr, cc, kr, kc)]
+            for rr, cc in self._squares_of(color):
+                if self.board.get(rr, cc).kind == 'Q':
+                    return [(rr, cc, kr, kc)]
         except Exception:
             return []
         return []
 
-    def legal_moves_for_active(self) -> List[Tuple[int, int, int, int]]:
+    def _legal_key(self, color: Any) -> Optional[tuple]:
+        """Cache key for the active colour's move list: placement hash plus the rule state it depends on.
+
+        Returns None (no caching) for engine variants whose Board keeps no Zobrist hash.
+        """
+        zhash = getattr(self.board, 'zhash', None)
+        if zhash is None:
+            return None
+        gs = getattr(engine, 'gs', None)
+        ctx_fn = getattr(engine, '_legal_cache_ctx', None)
+        return (
+            zhash,
+            color,
+            bool(getattr(gs, 'two_stage_active', False)),
+            bool(getattr(gs, 'chess_lock', False)),
+            getattr(gs, 'final_a', None),
+            getattr(gs, 'final_b', None),
+            bool(self.swap_available.get(color, False)),
+            ctx_fn() if callable(ctx_fn) else None,
+        )
+
+    def _legal_entry(self) -> Tuple[Tuple[Tuple[int, int, int, int], ...], frozenset]:
         color = self.active_color()
+        try:
+            key = self._legal_key(color)
+        except Exception:
+            key = None
+        entry = self._lm_cache.get(key) if key is not None else None
+        if entry is None:
+            moves = tuple(self._compute_legal_moves(color))
+            entry = (moves, frozenset(moves))
+            if key is not None:
+                self._lm_cache[key] = entry
+        return entry
+
+    def legal_moves_for_active(self) -> List[Tuple[int, int, int, int]]:
+        return list(self._legal_entry()[0])
+
+    def _compute_legal_moves(self, color: Any) -> List[Tuple[int, int, int, int]]:
         moves: List[Tuple[int, int, int, int]] = []
         # Enumerate per piece to tolerate engine variants that yield (er,ec) pairs
-        for r in range(engine.BOARD_SIZE):
-            for c in range(engine.BOARD_SIZE):
-                p = self.board.get(r, c)
-                if p is None or p.color != color:
-                    continue
+        for r, c in self._squares_of(color):
+            try:
+                base = engine.legal_moves_for_piece(self.board, r, c)
+            except Exception:
+                base = []
+            for mv in base:
                 try:
-                    base = engine.legal_moves_for_piece(self.board, r, c)
+                    if isinstance(mv, (list, tuple)) and len(mv) == 4:
+                        r0, c0, r1, c1 = mv
+                        moves.append((int(r0), int(c0), int(r1), int(c1)))
+                    elif isinstance(mv, (list, tuple)) and len(mv) == 2:
+                        er, ec = mv
+                        moves.append((r, c, int(er), int(ec)))
                 except Exception:
-                    base = []
-                for mv in base:
-                    try:
-                        if isinstance(mv, (list, tuple)) and len(mv) == 4:
-                            r0, c0, r1, c1 = mv
-                            moves.append((int(r0), int(c0), int(r1), int(c1)))
-                        elif isinstance(mv, (list, tuple)) and len(mv) == 2:
-                            er, ec = mv
-                            moves.append((r, c, int(er), int(ec)))
-                    except Exception:
-                        continue
+                    continue
         try:
             for swap_move in self._swap_moves_for(color):
                 moves.append(tuple(int(x) for x in swap_move))
@@ -465,10 +527,7 @@ class GoldenHeadlessEngine:
         p = self.board.get(sr, sc)
         if p is None or p.color != color:
             return False
-        for (r0, c0, r1, c1) in self.legal_moves_for_active():
-            if r0 == sr and c0 == sc and r1 == er and c1 == ec:
-                return True
-        return False
+        return (sr, sc, er, ec) in self._legal_entry()[1]
 
     # ---- Apply move and advance turn ----
     def apply_move(self, seat: str, sr: int, sc: int, er: int, ec: int) -> Dict[str, Any]:
@@ -538,6 +597,8 @@ class GoldenHeadlessEngine:
             cap, prev_has, prev_kind, eff = engine.board_do_move(self.board, sr, sc, er, ec, simulate=False)
             promoted = bool(eff.get("promoted")) if isinstance(eff, dict) else False
             self.swap_available[seat_color] = False
+        # En passant and the engine's ply-based rules are not in the placement hash
+        self._lm_cache.clear()
 
         record = {"by": seat_color.name, "sr": sr, "sc": sc, "er": er, "ec": ec}
         if swap_requested:
@@ -572,7 +633,7 @@ class GoldenHeadlessEngine:
         def clockwise_from(color: Any, candidates: List[Any]) -> Optional[Any]:
             if not candidates:
                 return None
-            idx = engine.TURN_ORDER.index(color)
+            idx = TURN_IDX[color]
             for i in range(1, 5):
                 nxt = engine.TURN_ORDER[(idx + i) % 4]
                 if nxt in candidates:
@@ -582,9 +643,9 @@ class GoldenHeadlessEngine:
         self.forced_turn = clockwise_from(seat_color, victims) if victims else None
 
         if self.forced_turn is None:
-            self.turn_i = (engine.TURN_ORDER.index(seat_color) + 1) % 4
+            self.turn_i = (TURN_IDX[seat_color] + 1) % 4
         else:
-            self.turn_i = (engine.TURN_ORDER.index(seat_color) + 1) % 4
+            self.turn_i = (TURN_IDX[seat_color] + 1) % 4
 
         try:
             gs = getattr(engine, 'gs', None)
@@ -602,16 +663,8 @@ class GoldenHeadlessEngine:
                 for col in finals:
                     if col is None:
                         continue
-                    entered = False
                     try:
-                        for rr in range(engine.BOARD_SIZE):
-                            if entered:
-                                break
-                            for cc in range(engine.BOARD_SIZE):
-                                p = self.board.get(rr, cc)
-                                if p and p.color == col and engine.in_chess_area(rr, cc):
-                                    entered = True
-                                    break
+                        entered = any(engine.in_chess_area(rr, cc) for rr, cc in self._squares_of(col))
                     except Exception:
                         entered = False
                     try:
@@ -644,8 +697,9 @@ class GoldenHeadlessEngine:
                 if not two_active and thr > 0 and not swap_requested:
                     victim: Optional[Any] = None
                     try:
+                        alive_now = self.alive_colors()
                         for col, pts in (self.captured_points or {}).items():
-                            if col in self.alive_colors() and int(pts) >= thr:
+                            if col in alive_now and int(pts) >= thr:
                                 victim = col
                                 break
                     except Exception:
@@ -676,17 +730,18 @@ class GoldenHeadlessEngine:
     def _after_duel_seed(self) -> None:
         """Align turn pointer and clear forced-turn once the duel chess board is seeded."""
         self.forced_turn = None
+        self._lm_cache.clear()
         try:
             white_enum = getattr(engine.PColor, 'WHITE')
         except Exception:
             white_enum = None
         try:
-            if white_enum is not None and white_enum in engine.TURN_ORDER:
-                self.turn_i = engine.TURN_ORDER.index(white_enum)
+            if white_enum is not None and white_enum in TURN_IDX:
+                self.turn_i = TURN_IDX[white_enum]
             else:
                 alive = self.alive_colors()
                 if alive:
-                    self.turn_i = engine.TURN_ORDER.index(alive[0])
+                    self.turn_i = TURN_IDX[alive[0]]
         except Exception:
             self.turn_i = 0
         # Reset captured points to avoid legacy elimination thresholds influencing duel
@@ -710,15 +765,13 @@ class GoldenHeadlessEngine:
         self._duel_active_last = True
     def _manual_eliminate(self, color: Any) -> None:
         try:
-            for rr in range(engine.BOARD_SIZE):
-                for cc in range(engine.BOARD_SIZE):
-                    piece = self.board.get(rr, cc)
-                    if piece and getattr(piece, "color", None) == color:
-                        self.board.set(rr, cc, None)
+            for rr, cc in self._squares_of(color):
+                self.board.set(rr, cc, None)
         except Exception:
             pass
 
     def _eliminate_color(self, color: Any, *, reason: str = "capture") -> None:
+        self._lm_cache.clear()
         try:
             elim_fn = getattr(engine, 'eliminate_color', None)
             gs = getattr(engine, 'gs', None)
@@ -825,14 +878,11 @@ class GoldenHeadlessEngine:
         qr = qc = None
         queen_piece = None
         try:
-            for rr in range(engine.BOARD_SIZE):
-                for cc in range(engine.BOARD_SIZE):
-                    piece = self.board.get(rr, cc)
-                    if piece and getattr(piece, 'color', None) == color and piece.kind == 'Q':
-                        qr, qc, queen_piece = rr, cc, piece
-                        raise StopIteration
-        except StopIteration:
-            pass
+            for rr, cc in self._squares_of(color):
+                piece = self.board.get(rr, cc)
+                if piece.kind == 'Q':
+                    qr, qc, queen_piece = rr, cc, piece
+                    break
         except Exception:
             queen_piece = None
         if queen_piece is None or qr is None or qc is None:
@@ -858,6 +908,7 @@ class GoldenHeadlessEngine:
             self.turn_i = 0  # WHITE to move
             self.forced_turn = None
             self.moves_list = []
+            self._lm_cache.clear()
             self.chess_mode = True
             self.chess_board = chess.Board()
             # Reset captured points only for active colors
@@ -887,10 +938,7 @@ class EggHeadlessEngine:
             base_color = self.game.alive[self.game.turn_index]
         except Exception:
             base_color = engine.TURN_ORDER[0]
-        try:
-            self.turn_i = engine.TURN_ORDER.index(base_color)
-        except ValueError:
-            self.turn_i = 0
+        self.turn_i = TURN_IDX.get(base_color, 0)
         self.forced_turn = getattr(self.game, "forced_turn", None)
 
     def active_color(self) -> Any:
@@ -909,7 +957,7 @@ class EggHeadlessEngine:
                 if p is None:
                     row.append(None)
                 else:
-                    row.append({"kind": p.kind, "color": p.color.name})
+                    row.append(_piece_cell(p.kind, p.color.name))
             grid.append(row)
         return grid
 